@@ -0,0 +1,5 @@
+from fastapi import HTTPException
+
+
+async def ConflictError(detail: str):
+    raise HTTPException(status_code=409, detail=detail)
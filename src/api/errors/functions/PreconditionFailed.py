@@ -0,0 +1,5 @@
+from fastapi import HTTPException
+
+
+async def PreconditionFailedError(detail: str):
+    raise HTTPException(status_code=412, detail=detail)
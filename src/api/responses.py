@@ -0,0 +1,18 @@
+import uuid
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+def _default(value: Any) -> str:
+    # asyncpg hands back its own uuid.UUID subclass, which orjson does not
+    # recognise; anything else unexpected fails loudly.
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
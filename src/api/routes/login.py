@@ -2,10 +2,12 @@ from datetime import timedelta
 
 from core.config import ACCESS_TOKEN_EXPIRE_MINUTES
 from core.dependencies.get_db import get_db
+from core.read_your_writes import pin_to_primary
 from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
+from models.schemas.auth import Principal
 from models.schemas.auth import Token
 from services.auth import authenticate_user
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -32,5 +34,11 @@ async def login_for_access_token(
     access_token = create_access_token(
         data={"sub": user.email, "other_custom_data": [1, 2, 3, 4]},
         expires_delta=access_token_expires,
+        principal=Principal(
+            user_id=user.user_id, email=user.email, is_active=user.is_active
+        ),
     )
+    # Pins the new token, so a client that just signed up reads its own
+    # account from the primary.
+    await pin_to_primary(access_token)
     return Token(access_token=access_token, token_type="bearer")
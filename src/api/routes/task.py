@@ -1,33 +1,62 @@
 import uuid
+from datetime import datetime
 from logging import getLogger
+from typing import Optional
 
 from api.errors.exceptions.Forbidden import ForbiddenError
+from api.errors.functions.Conflict import ConflictError
 from api.errors.functions.Database import DatabaseError
 from api.errors.functions.NotAcceptable import NotAcceptableError
 from api.errors.functions.NotFound import NotFoundErrorCheck
+from api.errors.functions.PreconditionFailed import PreconditionFailedError
 from api.errors.functions.Unprocessable import UnprocessableError
+from api.responses import FastJSONResponse
 from core.dependencies.get_db import get_db
+from core.dependencies.get_db import get_read_db
+from core.events import task_events
+from core.read_your_writes import is_pinned_to_primary
 from db.models import Status
-from db.models import User
+from db.models import STATUS_TRANSITIONS
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Header
+from fastapi import Query
+from fastapi import Request
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from models.schemas.auth import Principal
+from models.schemas.task import BulkCreateTasks
+from models.schemas.task import BulkDeleteTasks
+from models.schemas.task import BulkTaskResponse
+from models.schemas.task import BulkUpdateTasks
 from models.schemas.task import CreateTask
 from models.schemas.task import DeletedTaskResponse
+from models.schemas.task import ExportFormat
 from models.schemas.task import RestoredTaskResponse
 from models.schemas.task import ShowTask
+from models.schemas.task import TaskPage
 from models.schemas.task import UpdatedTaskResponse
 from models.schemas.task import UpdateTaskRequest
 from services.auth import get_current_user_from_token
+from services.task import _advance_task_status
+from services.task import _bulk_create_tasks
+from services.task import _bulk_delete_tasks
+from services.task import _bulk_update_tasks
 from services.task import _create_task
 from services.task import _delete_task
+from services.task import _export_tasks
 from services.task import _get_authors
-from services.task import _get_producers
-from services.task import _get_task
+from services.task import _get_task_etag
+from services.task import _get_task_with_access
+from services.task import _get_user_tasks_page
 from services.task import _restore_task
+from services.task import _search_tasks_page
 from services.task import _update_task
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from utils.task.is_user_active import is_user_active
+from utils.etag import etag_matches
+from utils.etag import if_match_versions
+from utils.etag import make_etag
 
 
 task_router = APIRouter()
@@ -40,13 +69,13 @@ logger = getLogger(__name__)
 async def create_task(
     body: CreateTask,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user_from_token),
+    current_user: Principal = Depends(get_current_user_from_token),
 ) -> ShowTask:
-    if not is_user_active(current_user.user_id, db):
-        await NotAcceptableError("Author must be active.")
     try:
         task = await _create_task(author_id=current_user.user_id, body=body, session=db)
         return task
+    except ValueError as err:
+        await NotAcceptableError(str(err))
     except IntegrityError as err:
         logger.error(err)
         await DatabaseError(err)
@@ -55,73 +84,202 @@ async def create_task(
 @task_router.get("/", response_model=ShowTask)
 async def get_task(
     task_id: uuid.UUID,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user_from_token),
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user_from_token),
 ) -> ShowTask:
-    authors = await _get_authors(task_id=task_id, session=db)
-    producers = await _get_producers(task_id=task_id, session=db)
-    if current_user.user_id not in authors and current_user.user_id not in producers:
-        raise ForbiddenError
-    task = await _get_task(task_id=task_id, session=db)
+    if if_none_match is not None:
+        etag, has_access = await _get_task_etag(
+            task_id=task_id, user_id=current_user.user_id, session=db
+        )
+        await NotFoundErrorCheck(etag, "Task", task_id)
+        if not has_access:
+            raise ForbiddenError
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+    task, has_access, etag = await _get_task_with_access(
+        task_id=task_id, user_id=current_user.user_id, session=db
+    )
     await NotFoundErrorCheck(task, "Task", task_id)
+    if not has_access:
+        raise ForbiddenError
+    response.headers["ETag"] = etag
     return task
 
 
+@task_router.get("/created", response_model=TaskPage)
+async def get_created_tasks(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    status: Optional[Status] = None,
+    is_active: Optional[bool] = True,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user_from_token),
+) -> FastJSONResponse:
+    try:
+        page = await _get_user_tasks_page(
+            user_id=current_user.user_id,
+            assigned=False,
+            limit=limit,
+            cursor=cursor,
+            status=status,
+            is_active=is_active,
+            session=db,
+        )
+        return FastJSONResponse(page)
+    except ValueError as err:
+        await UnprocessableError(str(err))
+
+
+@task_router.get("/assigned", response_model=TaskPage)
+async def get_assigned_tasks(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    status: Optional[Status] = None,
+    is_active: Optional[bool] = True,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user_from_token),
+) -> FastJSONResponse:
+    try:
+        page = await _get_user_tasks_page(
+            user_id=current_user.user_id,
+            assigned=True,
+            limit=limit,
+            cursor=cursor,
+            status=status,
+            is_active=is_active,
+            session=db,
+        )
+        return FastJSONResponse(page)
+    except ValueError as err:
+        await UnprocessableError(str(err))
+
+
+@task_router.get("/search", response_model=TaskPage)
+async def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200),
+    prefix: bool = False,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    is_active: Optional[bool] = True,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user_from_token),
+) -> FastJSONResponse:
+    try:
+        page = await _search_tasks_page(
+            user_id=current_user.user_id,
+            terms=q,
+            prefix=prefix,
+            limit=limit,
+            cursor=cursor,
+            is_active=is_active,
+            session=db,
+        )
+        return FastJSONResponse(page)
+    except ValueError as err:
+        await UnprocessableError(str(err))
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+@task_router.get("/export", response_class=StreamingResponse)
+async def export_tasks(
+    request: Request,
+    format: ExportFormat = ExportFormat.ndjson,
+    since: Optional[datetime] = None,
+    current_user: Principal = Depends(get_current_user_from_token),
+) -> StreamingResponse:
+    use_primary = await is_pinned_to_primary(request.scope)
+    return StreamingResponse(
+        _export_tasks(
+            user_id=current_user.user_id,
+            export_format=format,
+            since=since,
+            use_primary=use_primary,
+        ),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format.value}"'},
+    )
+
+
+@task_router.get("/events", response_class=StreamingResponse)
+async def stream_task_events(
+    last_event_id: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_user_from_token),
+) -> StreamingResponse:
+    return StreamingResponse(
+        task_events.stream(user_id=current_user.user_id, last_event_id=last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @task_router.patch("/", response_model=UpdatedTaskResponse)
 async def update_task(
     task_id: uuid.UUID,
     body: UpdateTaskRequest,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user_from_token),
+    current_user: Principal = Depends(get_current_user_from_token),
 ) -> UpdatedTaskResponse:
     update_task_params = body.model_dump(exclude_none=True)
     if update_task_params == {}:
         await UnprocessableError("At least one parameter must be provided.")
-    authors = await _get_authors(task_id=task_id, session=db)
-    if current_user.user_id not in authors:
-        raise ForbiddenError
-    task = await _get_task(task_id=task_id, session=db)
-    await NotFoundErrorCheck(task, "Task", task_id)
-    updated_task_id = await _update_task(
-        task_id=task_id, update_task_params=update_task_params, session=db
+    updated_task, current = await _update_task(
+        task_id=task_id,
+        user_id=current_user.user_id,
+        update_task_params=update_task_params,
+        expected_versions=if_match_versions(if_match, task_id),
+        session=db,
     )
-    await NotFoundErrorCheck(updated_task_id, "Task", task_id)
-    return UpdatedTaskResponse(updated_task_id=updated_task_id)
+    if updated_task is None:
+        await NotFoundErrorCheck(current, "Task", task_id)
+        if not current.is_author:
+            raise ForbiddenError
+        await PreconditionFailedError("Task has been modified.")
+    response.headers["ETag"] = make_etag(task_id, updated_task.version)
+    return UpdatedTaskResponse(updated_task_id=updated_task.task_id)
 
 
 @task_router.patch("/status", response_model=UpdatedTaskResponse)
 async def update_task_status(
     task_id: uuid.UUID,
+    expected_status: Status,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user_from_token),
+    current_user: Principal = Depends(get_current_user_from_token),
 ) -> UpdatedTaskResponse:
-    task = await _get_task(task_id=task_id, session=db)
-    await NotFoundErrorCheck(task, "Task", task_id)
-    new_status = await task.next_status_level()
-    authors = await _get_authors(task_id=task_id, session=db)
-    producers = await _get_producers(task_id=task_id, session=db)
-    if new_status == Status.Completed:
-        if current_user.user_id in authors:
-            await _update_task(
-                task_id=task_id, update_task_params={"status": new_status}, session=db
-            )
-            deleted_task_id = await _delete_task(task_id=task_id, session=db)
-            return UpdatedTaskResponse(updated_task_id=deleted_task_id)
-        raise ForbiddenError
-    if current_user.user_id not in authors and current_user.user_id not in producers:
-        raise ForbiddenError
-    updated_task_id = await _update_task(
-        task_id=task_id, update_task_params={"status": new_status}, session=db
+    advanced_task, current = await _advance_task_status(
+        task_id=task_id,
+        user_id=current_user.user_id,
+        expected_status=expected_status,
+        session=db,
     )
-    await NotFoundErrorCheck(updated_task_id, "Task", task_id)
-    return UpdatedTaskResponse(updated_task_id=updated_task_id)
+    if advanced_task is not None:
+        return UpdatedTaskResponse(updated_task_id=advanced_task.task_id)
+    await NotFoundErrorCheck(current, "Task", task_id)
+    if not (current.is_author or current.is_producer):
+        raise ForbiddenError
+    if current.status != expected_status:
+        await ConflictError(
+            f"Task status is {current.status.value}, "
+            f"expected {expected_status.value}."
+        )
+    if current.status not in STATUS_TRANSITIONS:
+        await ConflictError(f"Task status {current.status.value} cannot be advanced.")
+    raise ForbiddenError
 
 
 @task_router.delete("/", response_model=DeletedTaskResponse)
 async def delete_task(
     task_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user_from_token),
+    current_user: Principal = Depends(get_current_user_from_token),
 ) -> DeletedTaskResponse:
     authors = await _get_authors(task_id=task_id, session=db)
     if current_user.user_id not in authors:
@@ -135,7 +293,7 @@ async def delete_task(
 async def restore_task(
     task_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user_from_token),
+    current_user: Principal = Depends(get_current_user_from_token),
 ) -> DeletedTaskResponse:
     authors = await _get_authors(task_id=task_id, session=db)
     if current_user.user_id not in authors:
@@ -143,3 +301,45 @@ async def restore_task(
     restored_task_id = await _restore_task(task_id=task_id, session=db)
     await NotFoundErrorCheck(restored_task_id, "Task", task_id)
     return RestoredTaskResponse(restored_task_id=restored_task_id)
+
+
+@task_router.post("/bulk", response_model=BulkTaskResponse)
+async def bulk_create_tasks(
+    body: BulkCreateTasks,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user_from_token),
+) -> FastJSONResponse:
+    try:
+        response = await _bulk_create_tasks(
+            author_id=current_user.user_id, body=body, session=db
+        )
+        return FastJSONResponse(response)
+    except ValueError as err:
+        await NotAcceptableError(str(err))
+    except IntegrityError as err:
+        logger.error(err)
+        await DatabaseError(err)
+
+
+@task_router.patch("/bulk", response_model=BulkTaskResponse)
+async def bulk_update_tasks(
+    body: BulkUpdateTasks,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user_from_token),
+) -> FastJSONResponse:
+    response = await _bulk_update_tasks(
+        user_id=current_user.user_id, body=body, session=db
+    )
+    return FastJSONResponse(response)
+
+
+@task_router.delete("/bulk", response_model=BulkTaskResponse)
+async def bulk_delete_tasks(
+    body: BulkDeleteTasks,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user_from_token),
+) -> FastJSONResponse:
+    response = await _bulk_delete_tasks(
+        user_id=current_user.user_id, body=body, session=db
+    )
+    return FastJSONResponse(response)
@@ -1,26 +1,37 @@
 import uuid
 from logging import getLogger
+from typing import Optional
 
 from api.errors.exceptions.Forbidden import ForbiddenError
 from api.errors.functions.Database import DatabaseError
 from api.errors.functions.NotFound import NotFoundErrorCheck
+from api.errors.functions.PreconditionFailed import PreconditionFailedError
 from api.errors.functions.Unprocessable import UnprocessableError
 from core.dependencies.get_db import get_db
-from db.models import User
+from core.dependencies.get_db import get_read_db
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Header
+from fastapi import Response
+from models.schemas.auth import Principal
 from models.schemas.user import CreateUser
 from models.schemas.user import DeletedUserResponse
 from models.schemas.user import ShowUser
 from models.schemas.user import UpdatedUserResponse
 from models.schemas.user import UpdateUserRequest
+from models.schemas.user import UserTaskStats
 from services.auth import get_current_user_from_token
 from services.user import _create_user
 from services.user import _delete_user
 from services.user import _get_user_by_id
+from services.user import _get_user_etag
+from services.user import _get_user_task_stats
 from services.user import _update_user
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from utils.etag import etag_matches
+from utils.etag import if_match_versions
+from utils.etag import make_etag
 
 
 user_router = APIRouter()
@@ -41,40 +52,62 @@ async def create_user(body: CreateUser, db: AsyncSession = Depends(get_db)) -> S
 @user_router.get("/", response_model=ShowUser)
 async def get_user_by_id(
     user_id: uuid.UUID,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user_from_token),
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user_from_token),
 ) -> ShowUser:
-    user = await _get_user_by_id(user_id=user_id, session=db)
+    if if_none_match is not None:
+        etag = await _get_user_etag(user_id=user_id, session=db)
+        await NotFoundErrorCheck(etag, "User", user_id)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+    user, etag = await _get_user_by_id(user_id=user_id, session=db)
     await NotFoundErrorCheck(user, "User", user_id)
+    response.headers["ETag"] = etag
     return user
 
 
+@user_router.get("/stats", response_model=UserTaskStats)
+async def get_user_task_stats(
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user_from_token),
+) -> UserTaskStats:
+    return await _get_user_task_stats(user_id=current_user.user_id, session=db)
+
+
 @user_router.patch("/", response_model=UpdatedUserResponse)
 async def update_user(
     user_id: uuid.UUID,
     body: UpdateUserRequest,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user_from_token),
+    current_user: Principal = Depends(get_current_user_from_token),
 ) -> UpdatedUserResponse:
     update_user_params = body.model_dump(exclude_none=True)
     if update_user_params == {}:
         await UnprocessableError("At least one parameter must be provided.")
     if user_id != current_user.user_id:
         raise ForbiddenError
-    user = await _get_user_by_id(user_id=user_id, session=db)
-    await NotFoundErrorCheck(user, "User", user_id)
-    updated_user_id = await _update_user(
-        user_id=user_id, update_user_params=update_user_params, session=db
+    updated_user, current_version = await _update_user(
+        user_id=user_id,
+        update_user_params=update_user_params,
+        expected_versions=if_match_versions(if_match, user_id),
+        session=db,
     )
-    await NotFoundErrorCheck(updated_user_id, "User", user_id)
-    return UpdatedUserResponse(updated_user_id=updated_user_id)
+    if updated_user is None:
+        await NotFoundErrorCheck(current_version, "User", user_id)
+        await PreconditionFailedError("User has been modified.")
+    response.headers["ETag"] = make_etag(user_id, updated_user.version)
+    return UpdatedUserResponse(updated_user_id=updated_user.user_id)
 
 
 @user_router.delete("/", response_model=DeletedUserResponse)
 async def delete_user(
     user_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user_from_token),
+    current_user: Principal = Depends(get_current_user_from_token),
 ) -> DeletedUserResponse:
     if user_id != current_user.user_id:
         raise ForbiddenError
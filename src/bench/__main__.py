@@ -0,0 +1,112 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+
+
+DESCRIPTION = """Load-testing benchmark for the ToDo API.
+
+Seeds a database with synthetic users and tasks, drives a weighted mix of
+API calls through the ASGI app in-process and reports p50/p95/p99 latency,
+throughput and per-request query counts for every route::
+
+    cd src
+    python -m bench --requests 2000 --concurrency 32 --output run.json
+    python -m bench --baseline run.json --max-regression 10
+
+Without ``--db-url`` a throwaway SQLite file stands in for Postgres. The
+target schema is dropped and recreated, so never point it at real data.
+"""
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m bench", description=DESCRIPTION)
+    parser.add_argument("--db-url", help="database URL (default: temp SQLite)")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--producers", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mix", help="weighted workloads, e.g. get_task=10,login=1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="compare against a saved JSON report")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=10.0,
+        help="fail when a compared metric grows by more than this percent",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.db_url is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="todo-bench-"), "bench.db")
+        args.db_url = f"sqlite+aiosqlite:///{db_path}"
+    # Settings are read at import time, so the URL must be in place first.
+    os.environ["REAL_DB_URL"] = args.db_url
+    logging.getLogger("core.query_counter").setLevel(logging.ERROR)
+
+    from bench.report import compare
+    from bench.report import summarize
+    from bench.runner import run
+    from bench.workloads import DEFAULT_MIX
+    from bench.workloads import parse_mix
+    from main import app
+
+    mix = parse_mix(args.mix or DEFAULT_MIX)
+    routes, wall_seconds = asyncio.run(
+        run(
+            app,
+            users=args.users,
+            tasks=args.tasks,
+            producers=args.producers,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            mix=mix,
+            rng_seed=args.seed,
+        )
+    )
+    report = {
+        "config": {
+            "dialect": args.db_url.split(":", 1)[0],
+            "users": args.users,
+            "tasks": args.tasks,
+            "producers": args.producers,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mix": mix,
+            "seed": args.seed,
+            "python": platform.python_version(),
+        },
+        "wall_seconds": round(wall_seconds, 3),
+        "routes": summarize(routes, wall_seconds),
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["comparison"], regressions = compare(
+            report, baseline, args.max_regression
+        )
+        if regressions:
+            print("Regressions:", *regressions, sep="\n  ", file=sys.stderr)
+            exit_code = 1
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
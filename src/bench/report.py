@@ -0,0 +1,94 @@
+import re
+from typing import Union
+
+import httpx
+
+
+SERVER_TIMING_RE = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+class RouteStats:
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.statuses: dict[int, int] = {}
+        self.queries = 0
+        self.db_ms = 0.0
+
+    def record(self, response: httpx.Response, elapsed: float) -> None:
+        self.latencies.append(elapsed)
+        code = response.status_code
+        self.statuses[code] = self.statuses.get(code, 0) + 1
+        match = SERVER_TIMING_RE.search(response.headers.get("server-timing", ""))
+        if match is not None:
+            self.db_ms += float(match.group(1))
+            self.queries += int(match.group(2))
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(
+        0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1)
+    )
+    return sorted_values[rank]
+
+
+def summarize(routes: dict[str, RouteStats], wall_seconds: float) -> dict:
+    summary = {}
+    for route, stats in sorted(routes.items()):
+        latencies = sorted(stats.latencies)
+        count = len(latencies)
+        summary[route] = {
+            "count": count,
+            "throughput_rps": round(count / wall_seconds, 2) if wall_seconds else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "mean_ms": round(sum(latencies) / count * 1000, 3) if count else 0.0,
+            "queries_per_request": round(stats.queries / count, 2) if count else 0.0,
+            "db_ms_per_request": round(stats.db_ms / count, 3) if count else 0.0,
+            "statuses": {str(code): n for code, n in sorted(stats.statuses.items())},
+            "errors": sum(n for code, n in stats.statuses.items() if code >= 500),
+        }
+    return summary
+
+
+COMPARED_METRICS = ("p50_ms", "p95_ms", "p99_ms", "queries_per_request")
+
+
+def compare(
+    current: dict, baseline: dict, max_regression_pct: float
+) -> tuple[dict, list[str]]:
+    """Diff per-route latency and query counts against a saved run."""
+    diff = {}
+    regressions = []
+    for route, stats in current["routes"].items():
+        base = baseline.get("routes", {}).get(route)
+        if base is None:
+            continue
+        route_diff = {}
+        for metric in COMPARED_METRICS:
+            change = _pct_change(base.get(metric), stats[metric])
+            route_diff[metric] = {
+                "baseline": base.get(metric),
+                "current": stats[metric],
+                "change_pct": change,
+            }
+            if change is not None and change > max_regression_pct:
+                regressions.append(f"{route} {metric} +{change}%")
+        throughput_change = _pct_change(
+            base.get("throughput_rps"), stats["throughput_rps"]
+        )
+        route_diff["throughput_rps"] = {
+            "baseline": base.get("throughput_rps"),
+            "current": stats["throughput_rps"],
+            "change_pct": throughput_change,
+        }
+        diff[route] = route_diff
+    return diff, regressions
+
+
+def _pct_change(before: Union[float, None], after: float) -> Union[float, None]:
+    if not before:
+        return None
+    return round((after - before) / before * 100, 2)
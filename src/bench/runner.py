@@ -0,0 +1,61 @@
+import asyncio
+import random
+import time
+
+import httpx
+from bench.report import RouteStats
+from bench.seed import reset_schema
+from bench.seed import seed
+from bench.workloads import WorkloadContext
+from bench.workloads import WORKLOADS
+from db import session as db_session
+from fastapi import FastAPI
+
+
+async def run(
+    app: FastAPI,
+    users: int,
+    tasks: int,
+    producers: int,
+    requests: int,
+    concurrency: int,
+    mix: dict[str, int],
+    rng_seed: int,
+) -> tuple[dict[str, RouteStats], float]:
+    rng = random.Random(rng_seed)
+    routes: dict[str, RouteStats] = {}
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    # Draw the whole schedule up front so a given seed replays the same mix.
+    schedule = rng.choices(names, weights=weights, k=requests)
+    queue: asyncio.Queue = asyncio.Queue()
+    for name in schedule:
+        queue.put_nowait(name)
+
+    async with app.router.lifespan_context(app):
+        await reset_schema(db_session.engine)
+        data = await seed(db_session.engine, users, tasks, producers, rng)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            ctx = WorkloadContext(client, data, producers)
+
+            async def worker(worker_rng: random.Random) -> None:
+                while not queue.empty():
+                    workload = WORKLOADS[queue.get_nowait()]
+                    results = await workload(ctx, worker_rng)
+                    # httpx times every request on its own, so each route is
+                    # charged only for its own responses.
+                    for route, response in results:
+                        routes.setdefault(route, RouteStats()).record(
+                            response, response.elapsed.total_seconds()
+                        )
+
+            workers = [
+                worker(random.Random(rng.getrandbits(64))) for _ in range(concurrency)
+            ]
+            started = time.perf_counter()
+            await asyncio.gather(*workers)
+            wall_seconds = time.perf_counter() - started
+    return routes, wall_seconds
@@ -0,0 +1,101 @@
+import random
+import uuid
+from collections import Counter
+from datetime import datetime
+from datetime import timezone
+
+from db.models import Base
+from db.models import Status
+from db.models import Task
+from db.models import TaskStatusCount
+from db.models import User
+from db.models import UserAssignedTask
+from db.models import UserCreatedTask
+from models.schemas.auth import Hasher
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+BENCH_PASSWORD = "bench-password"
+
+
+class SeedData:
+    def __init__(self):
+        self.users: list[tuple[uuid.UUID, str]] = []
+        # task_id -> author user_id
+        self.tasks: dict[uuid.UUID, uuid.UUID] = {}
+
+
+async def reset_schema(engine: AsyncEngine) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def seed(
+    engine: AsyncEngine, users: int, tasks: int, producers: int, rng: random.Random
+) -> SeedData:
+    data = SeedData()
+    # bcrypt is deliberately slow, so every seeded user shares one hash.
+    hashed_password = Hasher.get_password_hash(BENCH_PASSWORD)
+    user_rows = []
+    for n in range(users):
+        user_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+        email = f"bench-user-{n}@example.com"
+        data.users.append((user_id, email))
+        user_rows.append(
+            {
+                "user_id": user_id,
+                "username": f"bench-user-{n}",
+                "email": email,
+                "hashed_password": hashed_password,
+            }
+        )
+
+    task_rows = []
+    author_rows = []
+    producer_rows = []
+    user_ids = [user_id for user_id, _ in data.users]
+    created_at = datetime.now(timezone.utc)
+    for n in range(tasks):
+        task_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+        author_id = rng.choice(user_ids)
+        data.tasks[task_id] = author_id
+        task_rows.append(
+            {
+                "task_id": task_id,
+                "task": f"task {n}",
+                "status": Status.Zero,
+                "created_at": created_at,
+            }
+        )
+        author_rows.append(
+            {"user_id": author_id, "task_id": task_id, "created_at": created_at}
+        )
+        for producer_id in rng.sample(user_ids, min(producers, len(user_ids))):
+            producer_rows.append(
+                {"user_id": producer_id, "task_id": task_id, "created_at": created_at}
+            )
+
+    # Every seeded task is active and in Zero, so the counters are per-user
+    # link counts.
+    counts = Counter(
+        [("created", row["user_id"]) for row in author_rows]
+        + [("assigned", row["user_id"]) for row in producer_rows]
+    )
+    count_rows = [
+        {"user_id": user_id, "role": role, "status": Status.Zero, "count": count}
+        for (role, user_id), count in counts.items()
+    ]
+
+    async with engine.begin() as conn:
+        for model, rows in (
+            (User, user_rows),
+            (Task, task_rows),
+            (UserCreatedTask, author_rows),
+            (UserAssignedTask, producer_rows),
+            (TaskStatusCount, count_rows),
+        ):
+            if rows:
+                await conn.execute(insert(model.__table__), rows)
+    return data
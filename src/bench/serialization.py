@@ -0,0 +1,138 @@
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from datetime import timezone
+
+from api.responses import FastJSONResponse
+from db.models import Status
+from db.models import Task
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from models.schemas.task import BulkTaskResponse
+from models.schemas.task import BulkTaskResult
+from models.schemas.task import ShowTask
+from models.schemas.task import TaskPage
+from services.task import _bulk_result
+from services.task import _task_item
+
+
+DESCRIPTION = """Micro-benchmark for response serialization.
+
+Compares the CPU spent turning a large task page and a bulk result into
+response bytes on the model path (ORM objects -> ShowTask -> FastAPI
+response_model validation -> stdlib JSON) and on the fast path (row mappings
+-> plain dicts -> orjson)::
+
+    cd src
+    python -m bench.serialization --items 200 --bulk 1000
+"""
+
+
+def _tasks(count: int) -> list[Task]:
+    now = datetime.now(timezone.utc)
+    return [
+        Task(
+            task_id=uuid.uuid4(),
+            task=f"benchmark task number {n}",
+            status=Status.Active.value,
+            created_at=now,
+        )
+        for n in range(count)
+    ]
+
+
+def _rows(tasks: list[Task]) -> list[dict]:
+    return [
+        {
+            "task_id": task.task_id,
+            "task": task.task,
+            "status": task.status,
+            "created_at": task.created_at,
+        }
+        for task in tasks
+    ]
+
+
+async def _model_response(field, content) -> bytes:
+    # What FastAPI does for a route returning a model with response_model set.
+    body = await serialize_response(field=field, response_content=content)
+    return JSONResponse(body).body
+
+
+def page_model_path(tasks: list[Task]) -> bytes:
+    page = TaskPage(items=[ShowTask.model_validate(task) for task in tasks])
+    return LOOP.run_until_complete(_model_response(PAGE_FIELD, page))
+
+
+def page_fast_path(rows: list[dict]) -> bytes:
+    page = {"items": [_task_item(row) for row in rows], "next_cursor": None}
+    return FastJSONResponse(page).body
+
+
+def bulk_model_path(task_ids: list[uuid.UUID]) -> bytes:
+    response = BulkTaskResponse(
+        results=[BulkTaskResult(task_id=task_id, ok=True) for task_id in task_ids]
+    )
+    return LOOP.run_until_complete(_model_response(BULK_FIELD, response))
+
+
+def bulk_fast_path(task_ids: list[uuid.UUID]) -> bytes:
+    response = {"results": [_bulk_result(task_id, None) for task_id in task_ids]}
+    return FastJSONResponse(response).body
+
+
+LOOP = asyncio.new_event_loop()
+PAGE_FIELD = create_model_field(name="Response_page", type_=TaskPage)
+BULK_FIELD = create_model_field(name="Response_bulk", type_=BulkTaskResponse)
+
+
+def measure(func, arg, rounds: int) -> float:
+    func(arg)
+    started = time.process_time()
+    for _ in range(rounds):
+        func(arg)
+    return (time.process_time() - started) / rounds
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument("--items", type=int, default=200, help="tasks per page")
+    parser.add_argument("--bulk", type=int, default=1000, help="bulk results")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    tasks = _tasks(args.items)
+    rows = _rows(tasks)
+    task_ids = [uuid.uuid4() for _ in range(args.bulk)]
+    cases = (
+        (
+            f"task page ({args.items} items)",
+            page_model_path,
+            tasks,
+            page_fast_path,
+            rows,
+        ),
+        (
+            f"bulk response ({args.bulk} results)",
+            bulk_model_path,
+            task_ids,
+            bulk_fast_path,
+            task_ids,
+        ),
+    )
+    for name, model_path, model_arg, fast_path, fast_arg in cases:
+        model_cpu = measure(model_path, model_arg, args.rounds)
+        fast_cpu = measure(fast_path, fast_arg, args.rounds)
+        print(
+            f"{name}: model path {model_cpu * 1e3:.3f} ms, "
+            f"fast path {fast_cpu * 1e3:.3f} ms, "
+            f"saved {(model_cpu - fast_cpu) * 1e3:.3f} ms "
+            f"({model_cpu / fast_cpu:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import random
+import uuid
+from typing import Awaitable
+from typing import Callable
+
+import httpx
+from bench.seed import BENCH_PASSWORD
+from bench.seed import SeedData
+from db.models import Status
+from db.models import STATUS_TRANSITIONS
+from models.schemas.auth import Principal
+from utils.auth.security import create_access_token
+
+
+class WorkloadContext:
+    def __init__(self, client: httpx.AsyncClient, data: SeedData, producers: int):
+        self.client = client
+        self.data = data
+        self.producers = producers
+        self.task_ids = list(data.tasks)
+        self.user_ids = [user_id for user_id, _ in data.users]
+        # Last status seen per task (seeded and new tasks start in Zero), sent
+        # as expected_status when advancing.
+        self.statuses: dict[uuid.UUID, Status] = {}
+        # Tokens are minted up front so that only the login workload pays
+        # for bcrypt.
+        self.headers = {
+            user_id: {
+                "Authorization": "Bearer "
+                + create_access_token(
+                    data={"sub": email},
+                    principal=Principal(user_id=user_id, email=email, is_active=True),
+                )
+            }
+            for user_id, email in data.users
+        }
+
+    def random_task(self, rng: random.Random) -> tuple[uuid.UUID, dict]:
+        task_id = rng.choice(self.task_ids)
+        return task_id, self.headers[self.data.tasks[task_id]]
+
+
+# Each workload performs one or more requests and returns them as
+# (route, response) pairs so the runner can time them per route.
+Workload = Callable[
+    [WorkloadContext, random.Random], Awaitable[list[tuple[str, httpx.Response]]]
+]
+
+
+async def login(ctx: WorkloadContext, rng: random.Random):
+    _, email = rng.choice(ctx.data.users)
+    response = await ctx.client.post(
+        "/login/token", data={"username": email, "password": BENCH_PASSWORD}
+    )
+    return [("POST /login/token", response)]
+
+
+async def create_task(ctx: WorkloadContext, rng: random.Random):
+    author_id = rng.choice(ctx.user_ids)
+    producers = rng.sample(ctx.user_ids, min(ctx.producers, len(ctx.user_ids)))
+    response = await ctx.client.post(
+        "/task/",
+        json={
+            "task": "bench task",
+            "producers_ids": [str(producer_id) for producer_id in producers],
+        },
+        headers=ctx.headers[author_id],
+    )
+    if response.status_code == 200:
+        task_id = uuid.UUID(response.json()["task_id"])
+        ctx.data.tasks[task_id] = author_id
+        ctx.task_ids.append(task_id)
+    return [("POST /task/", response)]
+
+
+async def get_task(ctx: WorkloadContext, rng: random.Random):
+    task_id, headers = ctx.random_task(rng)
+    response = await ctx.client.get(
+        "/task/", params={"task_id": str(task_id)}, headers=headers
+    )
+    return [("GET /task/", response)]
+
+
+async def advance_status(ctx: WorkloadContext, rng: random.Random):
+    task_id, headers = ctx.random_task(rng)
+    expected_status = ctx.statuses.get(task_id, Status.Zero)
+    params = {"task_id": str(task_id)}
+    response = await ctx.client.patch(
+        "/task/status",
+        params={**params, "expected_status": expected_status.value},
+        headers=headers,
+    )
+    results = [("PATCH /task/status", response)]
+    if response.status_code == 200:
+        ctx.statuses[task_id] = STATUS_TRANSITIONS[expected_status]
+    elif response.status_code in (404, 409):
+        # Completed tasks are inactive; bring them back so the mix can go on.
+        restored = await ctx.client.post(
+            "/task/restore", params=params, headers=headers
+        )
+        results.append(("POST /task/restore", restored))
+        if restored.status_code == 200:
+            ctx.statuses[task_id] = Status.Zero
+        else:
+            # Still active: another worker advanced it first.
+            current = await ctx.client.get("/task/", params=params, headers=headers)
+            results.append(("GET /task/", current))
+            if current.status_code == 200:
+                ctx.statuses[task_id] = Status(current.json()["status"])
+    return results
+
+
+async def delete_restore(ctx: WorkloadContext, rng: random.Random):
+    task_id, headers = ctx.random_task(rng)
+    params = {"task_id": str(task_id)}
+    deleted = await ctx.client.delete("/task/", params=params, headers=headers)
+    restored = await ctx.client.post("/task/restore", params=params, headers=headers)
+    if restored.status_code == 200:
+        ctx.statuses[task_id] = Status.Zero
+    return [("DELETE /task/", deleted), ("POST /task/restore", restored)]
+
+
+async def user_stats(ctx: WorkloadContext, rng: random.Random):
+    user_id = rng.choice(ctx.user_ids)
+    response = await ctx.client.get("/user/stats", headers=ctx.headers[user_id])
+    return [("GET /user/stats", response)]
+
+
+WORKLOADS: dict[str, Workload] = {
+    "login": login,
+    "create_task": create_task,
+    "get_task": get_task,
+    "advance_status": advance_status,
+    "delete_restore": delete_restore,
+    "user_stats": user_stats,
+}
+
+DEFAULT_MIX = "login=1,create_task=2,get_task=10,advance_status=3,delete_restore=1"
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in WORKLOADS:
+            raise ValueError(f"Unknown workload: {name}")
+        weights[name] = int(weight or 1)
+    return weights
@@ -0,0 +1,89 @@
+import asyncio
+import time
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from logging import getLogger
+from typing import AsyncIterator
+from typing import NamedTuple
+from typing import Union
+
+from core.config import TASK_ARCHIVE_AFTER_SECONDS
+from core.config import TASK_ARCHIVE_BATCH_SIZE
+from core.config import TASK_ARCHIVE_INTERVAL_SECONDS
+from core.config import TASK_ARCHIVE_PAUSE_SECONDS
+from db.session import async_session
+from repositories.DALs.taskArchiveDAL import TaskArchiveDAL
+
+
+logger = getLogger(__name__)
+
+
+class ArchiveBatch(NamedTuple):
+    tasks: int
+    links: int
+    seconds: float
+
+
+async def archive_batch(batch_size: int, older_than_seconds: float) -> ArchiveBatch:
+    # Every batch is its own short transaction, so row locks are held only
+    # for one batch and a failure loses at most one batch of progress.
+    start = time.perf_counter()
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=older_than_seconds)
+    async with async_session() as session:
+        async with session.begin():
+            tasks, links = await TaskArchiveDAL(session).archive_tasks(
+                cutoff=cutoff, limit=batch_size
+            )
+    return ArchiveBatch(tasks, links, time.perf_counter() - start)
+
+
+async def archive_tasks(
+    batch_size: int = TASK_ARCHIVE_BATCH_SIZE,
+    older_than_seconds: float = TASK_ARCHIVE_AFTER_SECONDS,
+    pause_seconds: float = TASK_ARCHIVE_PAUSE_SECONDS,
+    max_batches: Union[int, None] = None,
+) -> AsyncIterator[ArchiveBatch]:
+    """Archive batch after batch until a batch comes back short."""
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        batch = await archive_batch(batch_size, older_than_seconds)
+        batches += 1
+        if batch.tasks:
+            yield batch
+        if batch.tasks < batch_size:
+            return
+        await asyncio.sleep(pause_seconds)
+
+
+class TaskArchiver:
+    """Runs archive_tasks in the background every `interval_seconds`."""
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._task: Union[asyncio.Task, None] = None
+
+    def start(self) -> None:
+        if self._task is None and self.interval_seconds > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            archived = 0
+            try:
+                async for batch in archive_tasks():
+                    archived += batch.tasks
+            except Exception:
+                logger.exception("Task archiving failed, retrying next interval")
+            if archived:
+                logger.info("Archived %d inactive tasks", archived)
+
+
+task_archiver = TaskArchiver(TASK_ARCHIVE_INTERVAL_SECONDS)
@@ -0,0 +1,145 @@
+import functools
+import json
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import Protocol
+from typing import Union
+
+from core.config import CACHE_BACKEND
+from core.config import CACHE_MAX_SIZE
+from core.config import CACHE_TTL_SECONDS
+from core.config import CACHE_URL
+from core.metrics import CACHE_HITS
+from core.metrics import CACHE_MISSES
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> Union[Any, None]: ...
+
+    async def set(self, key: str, value: Any, ttl_seconds: float) -> None: ...
+
+    async def delete(self, *keys: str) -> None: ...
+
+
+class MemoryCacheBackend:
+    """Per-process LRU with a TTL on every entry."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Union[Any, None]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+
+class SharedCacheBackend:
+    """Cache shared between workers, backed by any redis-compatible client.
+
+    The client only needs async ``get``, ``set(..., px=...)`` and ``delete``,
+    so a local stand-in such as fakeredis works for development and tests.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    async def get(self, key: str) -> Union[Any, None]:
+        raw = await self.client.get(key)
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        await self.client.set(key, json.dumps(value), px=int(ttl_seconds * 1000))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*keys)
+
+
+class Cache:
+    def __init__(
+        self,
+        backend: CacheBackend,
+        namespace: str,
+        ttl_seconds: float,
+        name: Union[str, None] = None,
+    ):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self._hits_metric = CACHE_HITS.labels(cache=name or namespace)
+        self._misses_metric = CACHE_MISSES.labels(cache=name or namespace)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Union[Any, None]:
+        value = await self.backend.get(self._key(key))
+        if value is None:
+            self._misses_metric.inc()
+        else:
+            self._hits_metric.inc()
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        if self.ttl_seconds > 0:
+            await self.backend.set(self._key(key), value, self.ttl_seconds)
+
+    async def delete(self, *keys: str) -> None:
+        await self.backend.delete(*[self._key(key) for key in keys])
+
+
+@functools.cache
+def _shared_client():
+    from redis import asyncio as aioredis
+
+    return aioredis.from_url(CACHE_URL)
+
+
+def create_cache_backend(max_size: int = CACHE_MAX_SIZE) -> CacheBackend:
+    # Every shared backend talks to the same server over one connection pool;
+    # memory backends each get their own LRU of ``max_size`` entries.
+    if CACHE_BACKEND == "shared":
+        return SharedCacheBackend(_shared_client())
+    return MemoryCacheBackend(max_size=max_size)
+
+
+cache_backend = create_cache_backend()
+
+# Task and user entries carry their ETag; the namespaces were versioned when it
+# was added so a shared cache never serves entries written without one.
+task_cache = Cache(
+    cache_backend, namespace="task.v2", ttl_seconds=CACHE_TTL_SECONDS, name="task"
+)
+
+# Authors and producers are fixed when a task is created, so a caller's access
+# to a task only needs to expire, not to be invalidated.
+task_access_cache = Cache(
+    cache_backend, namespace="task_access", ttl_seconds=CACHE_TTL_SECONDS
+)
+
+user_cache = Cache(
+    cache_backend, namespace="user.v2", ttl_seconds=CACHE_TTL_SECONDS, name="user"
+)
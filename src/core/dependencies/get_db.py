@@ -1,11 +1,43 @@
 from typing import Generator
 
+from core.read_your_writes import is_pinned_to_primary
 from db.session import async_session
+from db.session import commit
+from db.session import discard_after_commit
+from db.session import replica_router
+from fastapi import Depends
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 async def get_db() -> Generator:
-    try:
-        async with async_session() as session:
+    # One unit of work per request: the session begins its transaction (and
+    # checks a connection out of the pool) on the first statement, and is
+    # committed once after the route returns or rolled back if it raises.
+    # Requests that never touch the database never take a connection. Cache
+    # invalidations queued by the DALs run after the commit.
+    async with async_session() as session:
+        try:
             yield session
-    finally:
-        await session.close()
+        except Exception:
+            await session.rollback()
+            discard_after_commit(session)
+            raise
+        await commit(session)
+
+
+async def get_read_db(
+    request: Request, db: AsyncSession = Depends(get_db)
+) -> Generator:
+    # For read-only routes: a replica unless the client wrote recently, in
+    # which case the request's primary unit of work is shared.
+    if not replica_router.engines or await is_pinned_to_primary(request.scope):
+        yield db
+        return
+    async with replica_router.session() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+        await session.commit()
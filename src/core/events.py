@@ -0,0 +1,276 @@
+import asyncio
+import json
+import uuid
+from collections import defaultdict
+from collections import deque
+from logging import getLogger
+from typing import AsyncIterator
+from typing import Union
+
+from core.config import TASK_EVENTS_BUFFER_SIZE
+from core.config import TASK_EVENTS_CHANNEL
+from core.config import TASK_EVENTS_HEARTBEAT_SECONDS
+from core.config import TASK_EVENTS_QUEUE_SIZE
+from core.metrics import TASK_EVENT_SUBSCRIBERS
+from core.metrics import TASK_EVENTS_DROPPED
+from core.metrics import TASK_EVENTS_PUBLISHED
+from sqlalchemy import ARRAY
+from sqlalchemy import bindparam
+from sqlalchemy import text
+from sqlalchemy import UUID
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+logger = getLogger(__name__)
+
+# NOTIFY payloads are capped at 8000 bytes, so larger audiences are left out
+# of the payload and looked up by the listener instead.
+MAX_INLINE_AUDIENCE = 150
+
+_AUDIENCE_SQL = """
+    SELECT user_id FROM user_created_tasks WHERE task_id = {task_id}
+    UNION
+    SELECT user_id FROM user_assigned_tasks WHERE task_id = {task_id}
+"""
+
+# One statement publishes an event per task. NOTIFY is transactional, so
+# listeners only hear about changes once they are committed.
+_PUBLISH = text(
+    f"""
+    SELECT pg_notify(:channel, json_build_object(
+        'id', e.event_id,
+        'type', CAST(:event_type AS text),
+        'task_id', e.task_id,
+        'status', t.status,
+        'is_active', t.is_active,
+        'users', CASE WHEN cardinality(a.users) <= {MAX_INLINE_AUDIENCE}
+            THEN a.users END
+    )::text)
+    FROM unnest(:event_ids, :task_ids) AS e(event_id, task_id)
+    JOIN tasks t ON t.task_id = e.task_id
+    CROSS JOIN LATERAL (
+        SELECT ARRAY({_AUDIENCE_SQL.format(task_id="e.task_id")}) AS users
+    ) a
+    """
+).bindparams(
+    bindparam("event_ids", type_=ARRAY(UUID(as_uuid=True))),
+    bindparam("task_ids", type_=ARRAY(UUID(as_uuid=True))),
+)
+
+_AUDIENCE = text(_AUDIENCE_SQL.format(task_id=":task_id")).bindparams(
+    bindparam("task_id", type_=UUID(as_uuid=True))
+)
+
+
+async def publish_task_events(
+    session: AsyncSession, event_type: str, task_ids: list[uuid.UUID]
+) -> None:
+    if not task_ids or session.bind.dialect.name != "postgresql":
+        return
+    await session.execute(
+        _PUBLISH,
+        {
+            "channel": TASK_EVENTS_CHANNEL,
+            "event_type": event_type,
+            "event_ids": [uuid.uuid4() for _ in task_ids],
+            "task_ids": list(task_ids),
+        },
+    )
+
+
+def format_sse(event: Union[dict, None], event_type: Union[str, None] = None) -> str:
+    if event is None:
+        return f"event: {event_type}\ndata: {{}}\n\n"
+    data = {key: value for key, value in event.items() if key not in ("id", "users")}
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(data)}\n\n"
+
+
+def _drain(queue: asyncio.Queue) -> list:
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+
+class Subscription:
+    def __init__(self, user_id: uuid.UUID, queue_size: int):
+        self.user_id = str(user_id)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # Set when the queue overflowed: the stream catches up from the
+        # replay buffer instead of holding an unbounded backlog.
+        self.overflowed = False
+        # Set when the listener lost its connection and events may be gone.
+        self.reset = False
+
+
+class TaskEventBroker:
+    """Fans pg_notify task events out to per-user SSE subscribers.
+
+    Every worker keeps one LISTEN connection and a buffer of recent events in
+    the order Postgres delivered them, which is the same on every worker, so
+    a client can resume on any worker with Last-Event-ID.
+    """
+
+    def __init__(self, channel: str, queue_size: int, buffer_size: int):
+        self.channel = channel
+        self.queue_size = queue_size
+        self._buffer: deque = deque(maxlen=buffer_size)
+        self._subscribers: dict[str, set[Subscription]] = defaultdict(set)
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        self._engine: Union[AsyncEngine, None] = None
+        self._tasks: list[asyncio.Task] = []
+        self._lost: Union[asyncio.Event, None] = None
+
+    def start(self, engine: AsyncEngine) -> None:
+        if self._tasks or engine.dialect.name != "postgresql":
+            return
+        self._engine = engine
+        self._lost = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._listen()),
+            asyncio.create_task(self._dispatch()),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def subscribe(self, user_id: uuid.UUID) -> Subscription:
+        subscription = Subscription(user_id, self.queue_size)
+        self._subscribers[subscription.user_id].add(subscription)
+        TASK_EVENT_SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is not None and subscription in subscribers:
+            subscribers.remove(subscription)
+            TASK_EVENT_SUBSCRIBERS.dec()
+            if not subscribers:
+                del self._subscribers[subscription.user_id]
+
+    def replay(self, last_event_id: str, user_id: uuid.UUID) -> Union[list, None]:
+        """Buffered events after ``last_event_id``, or None if it was evicted."""
+        user_id = str(user_id)
+        events = list(self._buffer)
+        for position, event in enumerate(events, start=1):
+            if event["id"] == last_event_id:
+                newer = events[position:]
+                return [event for event in newer if user_id in event["users"]]
+        return None
+
+    async def stream(
+        self, user_id: uuid.UUID, last_event_id: Union[str, None] = None
+    ) -> AsyncIterator[str]:
+        """Yields SSE frames for ``user_id`` until the client goes away.
+
+        A ``reset`` event tells the client that events may have been missed
+        and it should refetch its tasks before relying on the stream again.
+        """
+        # Subscribing and reading the buffer happen without an await in
+        # between, so the queue only ever holds events newer than the replay.
+        subscription = self.subscribe(user_id)
+        try:
+            last_id = last_event_id
+            if last_event_id is not None:
+                replayed = self.replay(last_event_id, user_id)
+                if replayed is None:
+                    yield format_sse(None, "reset")
+                elif replayed:
+                    last_id = replayed[-1]["id"]
+                    yield "".join(format_sse(event) for event in replayed)
+            while True:
+                if subscription.reset:
+                    subscription.reset = False
+                    _drain(subscription.queue)
+                    yield format_sse(None, "reset")
+                    continue
+                if subscription.overflowed:
+                    # Dropped events are still in the buffer right after the
+                    # last one that made it into the queue.
+                    pending = _drain(subscription.queue)
+                    if pending:
+                        last_id = pending[-1]["id"]
+                    caught_up = self.replay(last_id, user_id) if last_id else None
+                    subscription.overflowed = False
+                    frames = "".join(format_sse(event) for event in pending)
+                    if caught_up is None:
+                        frames += format_sse(None, "reset")
+                    elif caught_up:
+                        last_id = caught_up[-1]["id"]
+                        frames += "".join(format_sse(event) for event in caught_up)
+                    yield frames
+                    continue
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), TASK_EVENTS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                last_id = event["id"]
+                yield format_sse(event)
+        finally:
+            self.unsubscribe(subscription)
+
+    async def _listen(self) -> None:
+        while True:
+            self._lost.clear()
+            try:
+                async with self._engine.connect() as conn:
+                    raw = await conn.get_raw_connection()
+                    driver = raw.driver_connection
+                    driver.add_termination_listener(lambda _: self._lost.set())
+                    await driver.add_listener(self.channel, self._on_notify)
+                    await self._lost.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Task event listener failed")
+            # Anything published while disconnected is lost.
+            for subscribers in self._subscribers.values():
+                for subscription in subscribers:
+                    subscription.reset = True
+            self._buffer.clear()
+            await asyncio.sleep(1)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        self._inbox.put_nowait(payload)
+
+    async def _dispatch(self) -> None:
+        while True:
+            payload = await self._inbox.get()
+            try:
+                event = json.loads(payload)
+                if event["users"] is None:
+                    event["users"] = await self._audience(event["task_id"])
+                event["users"] = set(event["users"])
+            except Exception:
+                logger.exception("Dropping malformed task event")
+                continue
+            self._buffer.append(event)
+            TASK_EVENTS_PUBLISHED.inc()
+            for user_id in event["users"]:
+                for subscription in self._subscribers.get(user_id, ()):
+                    if subscription.overflowed:
+                        continue
+                    try:
+                        subscription.queue.put_nowait(event)
+                    except asyncio.QueueFull:
+                        subscription.overflowed = True
+                        TASK_EVENTS_DROPPED.inc()
+
+    async def _audience(self, task_id: str) -> list[str]:
+        async with self._engine.connect() as conn:
+            res = await conn.execute(_AUDIENCE, {"task_id": uuid.UUID(task_id)})
+            return [str(user_id) for user_id in res.scalars()]
+
+
+task_events = TaskEventBroker(
+    channel=TASK_EVENTS_CHANNEL,
+    queue_size=TASK_EVENTS_QUEUE_SIZE,
+    buffer_size=TASK_EVENTS_BUFFER_SIZE,
+)
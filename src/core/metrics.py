@@ -0,0 +1,253 @@
+import functools
+import inspect
+import os
+import time
+from contextvars import ContextVar
+
+from prometheus_client import CollectorRegistry
+from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client import Counter
+from prometheus_client import Gauge
+from prometheus_client import generate_latest
+from prometheus_client import Histogram
+from prometheus_client import multiprocess
+from prometheus_client import REGISTRY
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method, route template and status code.",
+    ["method", "route", "status_code"],
+)
+
+# Gauges are summed over live workers when several share PROMETHEUS_MULTIPROC_DIR.
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being processed.",
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30),
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out of the pool.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured pool size plus current overflow.",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+DAL_CALLS = Counter(
+    "dal_calls_total",
+    "DAL method invocations.",
+    ["method"],
+)
+
+DAL_CALL_DURATION = Histogram(
+    "dal_call_duration_seconds",
+    "DAL method duration, including every statement it runs.",
+    ["method"],
+)
+
+DAL_QUERIES = Counter(
+    "dal_queries_total",
+    "SQL statements executed, by the DAL method that issued them.",
+    ["method"],
+)
+
+DAL_QUERY_DURATION = Histogram(
+    "dal_query_duration_seconds",
+    "SQL statement execution time, by the DAL method that issued it.",
+    ["method"],
+)
+
+PASSWORD_HASHING_DURATION = Histogram(
+    "password_hashing_duration_seconds",
+    "Time spent in bcrypt on the hashing pool, by operation.",
+    ["operation"],
+    buckets=(0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 1, 2, 5),
+)
+
+PASSWORD_HASHING_QUEUED = Gauge(
+    "password_hashing_queued",
+    "Hashing calls waiting for a worker slot.",
+    multiprocess_mode="livesum",
+)
+
+PASSWORD_HASHING_RUNNING = Gauge(
+    "password_hashing_running",
+    "Hashing calls running on the pool.",
+    multiprocess_mode="livesum",
+)
+
+CACHE_HITS = Counter(
+    "cache_hits",
+    "Cache lookups that found an entry.",
+    ["cache"],
+)
+
+CACHE_MISSES = Counter(
+    "cache_misses",
+    "Cache lookups that found nothing.",
+    ["cache"],
+)
+
+TASK_EVENT_SUBSCRIBERS = Gauge(
+    "task_event_subscribers",
+    "Open /task/events streams.",
+    multiprocess_mode="livesum",
+)
+
+TASK_EVENTS_PUBLISHED = Counter(
+    "task_events_published",
+    "Task events received from Postgres.",
+)
+
+TASK_EVENTS_DROPPED = Counter(
+    "task_events_dropped",
+    "Events a slow subscriber had to catch up on from the buffer.",
+)
+
+current_dal_method: ContextVar[str] = ContextVar("current_dal_method", default="")
+
+
+class PrometheusASGIMiddleware:
+    """Per-route latency and in-flight requests as a plain ASGI middleware.
+
+    The route template is read from the scope after routing has run, so the
+    middleware does no matching of its own and adds no task per request.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                method=scope["method"],
+                route=getattr(route, "path_format", "unmatched"),
+                status_code=status_code,
+            ).observe(time.perf_counter() - start)
+            REQUESTS_IN_FLIGHT.dec()
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+def instrument_dal(cls):
+    """Time every public coroutine method of a DAL and tag its statements."""
+    for name, method in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(method):
+            continue
+        setattr(cls, name, _instrument_dal_method(f"{cls.__name__}.{name}", method))
+    return cls
+
+
+def _instrument_dal_method(label: str, method):
+    calls = DAL_CALLS.labels(method=label)
+    duration = DAL_CALL_DURATION.labels(method=label)
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        token = current_dal_method.set(label)
+        start = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            duration.observe(time.perf_counter() - start)
+            calls.inc()
+            current_dal_method.reset(token)
+
+    return wrapper
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, params, context, many):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, params, context, many):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        method = current_dal_method.get() or "unknown"
+        DAL_QUERIES.labels(method=method).inc()
+        DAL_QUERY_DURATION.labels(method=method).observe(elapsed)
+
+
+def instrument_pool(name: str, engine: AsyncEngine) -> None:
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, AsyncAdaptedQueuePool):
+        return
+    checked_out = DB_POOL_CHECKED_OUT.labels(pool=name)
+    size = DB_POOL_SIZE.labels(pool=name)
+
+    @event.listens_for(pool, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_out.inc()
+        size.set(pool.size() + max(pool.overflow(), 0))
+
+    @event.listens_for(pool, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        checked_out.dec()
+        size.set(pool.size() + max(pool.overflow(), 0))
+
+
+def metrics(request: Request) -> Response:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_process_dead() -> None:
+    # Drops this worker's live gauges; its counters and histograms stay in the
+    # totals.
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,136 @@
+import json
+import time
+from collections import Counter
+from contextvars import ContextVar
+from logging import getLogger
+from logging import INFO
+from logging import WARNING
+from typing import Union
+
+from core.config import QUERY_BUDGET_DEFAULT
+from core.config import QUERY_BUDGET_STRICT
+from core.config import QUERY_BUDGETS
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+
+logger = getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter[str] = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.duration += elapsed
+        self.shapes[statement] += 1
+
+    def duplicates(self) -> dict[str, int]:
+        # Bound statements are already parameterised, so the SQL text is the
+        # statement shape; the same shape repeated within one request is the
+        # usual signature of an N+1 loop.
+        return {shape: n for shape, n in self.shapes.items() if n > 1}
+
+
+current_query_stats: ContextVar[Union[QueryStats, None]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+def install_query_counter(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, params, context, many):
+        if current_query_stats.get() is not None:
+            context._query_counter_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, params, context, many):
+        stats = current_query_stats.get()
+        start = getattr(context, "_query_counter_start", None)
+        if stats is not None and start is not None:
+            stats.record(statement, time.perf_counter() - start)
+
+
+class QueryCounterMiddleware:
+    """Counts the SQL each request runs and reports it.
+
+    The totals go into a ``Server-Timing`` header and one JSON log line. A
+    request over its budget logs a warning, or raises QueryBudgetExceeded
+    in strict mode so that test suites fail on N+1 regressions.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        default_budget: int = QUERY_BUDGET_DEFAULT,
+        budgets: Union[dict[str, int], None] = None,
+        strict: bool = QUERY_BUDGET_STRICT,
+    ):
+        self.app = app
+        self.default_budget = default_budget
+        self.budgets = QUERY_BUDGETS if budgets is None else budgets
+        self.strict = strict
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_stats.reset(token)
+        self._report(scope, stats)
+
+    def _report(self, scope: Scope, stats: QueryStats) -> None:
+        route = getattr(scope.get("route"), "path_format", scope["path"])
+        route_key = f"{scope['method']} {route}"
+        budget = self.budgets.get(route_key, self.default_budget)
+        duplicates = stats.duplicates()
+        over_budget = stats.count > budget
+        level = WARNING if over_budget or duplicates else INFO
+        if logger.isEnabledFor(level):
+            logger.log(
+                level,
+                json.dumps(
+                    {
+                        "event": "request_queries",
+                        "route": route_key,
+                        "queries": stats.count,
+                        "db_ms": round(stats.duration * 1000, 2),
+                        "budget": budget,
+                        "duplicates": duplicates,
+                    }
+                ),
+            )
+        if over_budget and self.strict:
+            raise QueryBudgetExceeded(
+                f"{route_key} ran {stats.count} queries, budget is {budget}."
+            )
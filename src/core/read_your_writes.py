@@ -0,0 +1,97 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import Union
+
+from core.cache import Cache
+from core.cache import create_cache_backend
+from core.config import CACHE_BACKEND
+from core.config import DB_READ_YOUR_WRITES_SECONDS
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class MemoryPinBackend:
+    """Per-process pins, kept apart from the caches so no cache traffic can
+    evict them. Every pin has the same TTL, so the oldest expire first and are
+    dropped as new ones come in."""
+
+    def __init__(self):
+        self._expires_at: OrderedDict[str, float] = OrderedDict()
+
+    async def get(self, key: str) -> Union[Any, None]:
+        expires_at = self._expires_at.get(key)
+        if expires_at is None or expires_at <= time.monotonic():
+            return None
+        return True
+
+    async def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        now = time.monotonic()
+        while self._expires_at and next(iter(self._expires_at.values())) <= now:
+            self._expires_at.popitem(last=False)
+        self._expires_at[key] = now + ttl_seconds
+        self._expires_at.move_to_end(key)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._expires_at.pop(key, None)
+
+
+primary_pins = Cache(
+    create_cache_backend() if CACHE_BACKEND == "shared" else MemoryPinBackend(),
+    namespace="primary_pin",
+    ttl_seconds=DB_READ_YOUR_WRITES_SECONDS,
+)
+
+
+def _token_key(token: bytes) -> str:
+    return hashlib.sha256(token).hexdigest()[:32]
+
+
+def _pin_key(scope: Scope) -> Union[str, None]:
+    # Clients are told apart by their bearer token. Unauthenticated writes are
+    # not pinned: a login pins the token it hands out instead.
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.partition(b" ")
+            if scheme.lower() == b"bearer" and token:
+                return _token_key(token)
+            return None
+    return None
+
+
+async def pin_to_primary(token: str) -> None:
+    await primary_pins.set(_token_key(token.encode()), True)
+
+
+async def is_pinned_to_primary(scope: Scope) -> bool:
+    key = _pin_key(scope)
+    return key is not None and await primary_pins.get(key) is not None
+
+
+class ReadYourWritesMiddleware:
+    """Pins a client to the primary for a while after each successful write."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                key = _pin_key(scope)
+                if key is not None:
+                    await primary_pins.set(key, True)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
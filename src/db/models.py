@@ -3,17 +3,39 @@ from enum import Enum
 
 from sqlalchemy import Boolean
 from sqlalchemy import Column
+from sqlalchemy import Computed
 from sqlalchemy import DateTime
+from sqlalchemy import Enum as SQLEnum
 from sqlalchemy import ForeignKey
 from sqlalchemy import func
+from sqlalchemy import Index
+from sqlalchemy import Integer
 from sqlalchemy import String
+from sqlalchemy import text
 from sqlalchemy import UUID
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import deferred
 from sqlalchemy.orm import relationship
+from sqlalchemy.schema import CreateColumn
 
 
 Base = declarative_base()
 
+TASK_SEARCH_CONFIG = "english"
+
+
+@compiles(CreateColumn)
+def _create_column(element, compiler, **kw):
+    # Postgres-only columns are left out of CREATE TABLE elsewhere (e.g. the
+    # SQLite database used by the benchmark suite).
+    if element.element.info.get("postgresql_only") and compiler.dialect.name != (
+        "postgresql"
+    ):
+        return None
+    return compiler.visit_create_column(element, **kw)
+
 
 class Status(str, Enum):
     Zero = "Zero"
@@ -22,12 +44,31 @@ class Status(str, Enum):
     Completed = "Completed"
 
 
+# A native enum on Postgres (4 bytes per row); elsewhere a short VARCHAR of the
+# member names. Either way rows come back as Status members.
+STATUS_TYPE = SQLEnum(Status, name="task_status")
+
+STATUS_TRANSITIONS = {
+    Status.Zero: Status.Active,
+    Status.Active: Status.Verify,
+    Status.Verify: Status.Completed,
+}
+
+
 class MyBase(Base):
     __abstract__ = True
 
     is_active = Column(Boolean, nullable=False, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped by every UPDATE, so it orders the writes to a row; ETags carry it.
+    version = Column(
+        Integer,
+        nullable=False,
+        default=1,
+        server_default="1",
+        onupdate=text("version + 1"),
+    )
 
     async def is_active_property(self):
         if self.is_active is False:
@@ -37,53 +78,170 @@ class MyBase(Base):
 
 class User(MyBase):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_active_email", "email", postgresql_where=text("is_active")),
+    )
 
     user_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     username = Column(String, nullable=False)
     email = Column(String, unique=True, nullable=False)
     hashed_password = Column(String, nullable=False)
 
-    created_tasks = relationship(
-        "UserCreatedTask", back_populates="user", lazy="selectin"
-    )
+    # Relationships never load implicitly: every query picks its own loading
+    # strategy, and touching one that was not loaded raises instead of
+    # issuing a hidden query.
+    created_tasks = relationship("UserCreatedTask", back_populates="user", lazy="raise")
     assigned_tasks = relationship(
-        "UserAssignedTask", back_populates="user", lazy="selectin"
+        "UserAssignedTask", back_populates="user", lazy="raise"
     )
 
 
 class Task(MyBase):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Serves the archiver's scan for old inactive tasks.
+        Index(
+            "ix_tasks_inactive_version",
+            text("coalesce(updated_at, created_at)"),
+            postgresql_where=text("NOT is_active"),
+        ),
+        Index(
+            "ix_tasks_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
 
     task_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     task = Column(String, nullable=False)
-    status = Column(String, default=Status.Zero)
-
-    authors = relationship("UserCreatedTask", back_populates="task", lazy="selectin")
-    producers = relationship("UserAssignedTask", back_populates="task", lazy="selectin")
+    status = Column(
+        STATUS_TYPE,
+        nullable=False,
+        default=Status.Zero,
+        server_default=Status.Zero.value,
+    )
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                f"to_tsvector('{TASK_SEARCH_CONFIG}', coalesce(task, ''))",
+                persisted=True,
+            ),
+            info={"postgresql_only": True},
+        )
+    )
 
-    async def next_status_level(self) -> str:
-        match self.status:
-            case Status.Zero:
-                return Status.Active
-            case Status.Active:
-                return Status.Verify
-            case Status.Verify:
-                return Status.Completed
+    authors = relationship("UserCreatedTask", back_populates="task", lazy="raise")
+    producers = relationship("UserAssignedTask", back_populates="task", lazy="raise")
 
 
 class UserCreatedTask(Base):
     __tablename__ = "user_created_tasks"
+    __table_args__ = (
+        Index("ix_user_created_tasks_task_id_user_id", "task_id", "user_id"),
+        Index(
+            "ix_user_created_tasks_user_id_created_at",
+            "user_id",
+            text("created_at DESC"),
+            text("task_id DESC"),
+        ),
+    )
+
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), primary_key=True)
     task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.task_id"), primary_key=True)
+    # The task's created_at, copied so a user's task pages are read in order
+    # from this table's index.
+    created_at = Column(DateTime(timezone=True), nullable=False)
 
-    user = relationship("User", back_populates="created_tasks")
-    task = relationship("Task", back_populates="authors")
+    user = relationship("User", back_populates="created_tasks", lazy="raise")
+    task = relationship("Task", back_populates="authors", lazy="raise")
 
 
 class UserAssignedTask(Base):
     __tablename__ = "user_assigned_tasks"
+    __table_args__ = (
+        Index("ix_user_assigned_tasks_task_id_user_id", "task_id", "user_id"),
+        Index(
+            "ix_user_assigned_tasks_user_id_created_at",
+            "user_id",
+            text("created_at DESC"),
+            text("task_id DESC"),
+        ),
+    )
+
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), primary_key=True)
     task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.task_id"), primary_key=True)
+    # Copied from the task, as in UserCreatedTask.
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+    user = relationship("User", back_populates="assigned_tasks", lazy="raise")
+    task = relationship("Task", back_populates="producers", lazy="raise")
 
-    user = relationship("User", back_populates="assigned_tasks")
-    task = relationship("Task", back_populates="producers")
+
+# Per-user task counts by role ("created" or "assigned") and status, kept up to
+# date by the TaskDAL write paths. Completed tasks stay counted after they are
+# deactivated; deleted tasks are not counted.
+class TaskStatusCount(Base):
+    __tablename__ = "task_status_counts"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), primary_key=True)
+    role = Column(String, primary_key=True)
+    status = Column(STATUS_TYPE, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+# Inactive tasks past TASK_ARCHIVE_AFTER_SECONDS, moved out of the hot tables
+# together with their link rows; TaskDAL.restore_task moves them back.
+class ArchivedTask(Base):
+    __tablename__ = "tasks_archive"
+
+    task_id = Column(UUID(as_uuid=True), primary_key=True)
+    task = Column(String, nullable=False)
+    status = Column(STATUS_TYPE, nullable=False)
+    is_active = Column(Boolean, nullable=False)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    version = Column(Integer, nullable=False, server_default="1")
+    archived_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+class ArchivedUserCreatedTask(Base):
+    __tablename__ = "user_created_tasks_archive"
+    __table_args__ = (
+        Index("ix_user_created_tasks_archive_task_id", "task_id"),
+        Index(
+            "ix_user_created_tasks_archive_user_id_created_at",
+            "user_id",
+            text("created_at DESC"),
+            text("task_id DESC"),
+        ),
+    )
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), primary_key=True)
+    task_id = Column(
+        UUID(as_uuid=True), ForeignKey("tasks_archive.task_id"), primary_key=True
+    )
+    # Copied with the live link row, so archived tasks page the same way.
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class ArchivedUserAssignedTask(Base):
+    __tablename__ = "user_assigned_tasks_archive"
+    __table_args__ = (
+        Index("ix_user_assigned_tasks_archive_task_id", "task_id"),
+        Index(
+            "ix_user_assigned_tasks_archive_user_id_created_at",
+            "user_id",
+            text("created_at DESC"),
+            text("task_id DESC"),
+        ),
+    )
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), primary_key=True)
+    task_id = Column(
+        UUID(as_uuid=True), ForeignKey("tasks_archive.task_id"), primary_key=True
+    )
+    # Copied as in ArchivedUserCreatedTask.
+    created_at = Column(DateTime(timezone=True), nullable=False)
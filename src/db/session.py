@@ -1,9 +1,156 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import Union
+
+from core.config import DB_ECHO
+from core.config import DB_MAX_OVERFLOW
+from core.config import DB_POOL_PRE_PING
+from core.config import DB_POOL_RECYCLE
+from core.config import DB_POOL_SIZE
+from core.config import DB_POOL_TIMEOUT
+from core.config import DB_PREPARED_STATEMENT_CACHE
+from core.config import DB_PREPARED_STATEMENT_CACHE_SIZE
+from core.config import DB_REPLICA_ROUTING
+from core.config import DB_REPLICA_URLS
+from core.config import DB_STATEMENT_CACHE_SIZE
 from core.config import REAL_DB_URL
+from core.metrics import InstrumentedAsyncQueuePool
+from sqlalchemy import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy.orm import sessionmaker
 
 
-engine = create_async_engine(REAL_DB_URL, future=True, echo=True)
+engine: Union[AsyncEngine, None] = None
+
+async_session = async_sessionmaker(expire_on_commit=False, class_=AsyncSession)
+
+
+class ReplicaRouter:
+    def __init__(self, strategy: str):
+        self.strategy = strategy
+        self.engines: list[AsyncEngine] = []
+        self.in_flight: list[int] = []
+        self._next = 0
+
+    def add(self, engine: AsyncEngine) -> None:
+        self.engines.append(engine)
+        self.in_flight.append(0)
+
+    def choose(self) -> int:
+        if self.strategy == "least_busy":
+            return min(range(len(self.engines)), key=self.in_flight.__getitem__)
+        index = self._next % len(self.engines)
+        self._next += 1
+        return index
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSession]:
+        index = self.choose()
+        self.in_flight[index] += 1
+        try:
+            async with async_session(
+                bind=self.engines[index], info={"replica": True}
+            ) as session:
+                yield session
+        finally:
+            self.in_flight[index] -= 1
+
+    async def dispose(self) -> None:
+        for engine in self.engines:
+            await engine.dispose()
+        self.engines = []
+        self.in_flight = []
+
+
+replica_router = ReplicaRouter(DB_REPLICA_ROUTING)
+
+
+@asynccontextmanager
+async def read_session(use_primary: bool = False) -> AsyncIterator[AsyncSession]:
+    if use_primary or not replica_router.engines:
+        async with async_session() as session:
+            yield session
+    else:
+        async with replica_router.session() as session:
+            yield session
+
+
+def is_replica(session: AsyncSession) -> bool:
+    """Replicas may lag behind the primary, so what they return must not be
+    cached for readers that expect their own writes."""
+    return session.info.get("replica", False)
+
+
+async def release_connection(session: AsyncSession) -> None:
+    """Ends a read-only transaction early so the pooled connection is not held
+    across slow non-database work; the next statement starts a new one."""
+    await session.commit()
+
+
+def call_after_commit(
+    session: AsyncSession, func: Callable[..., Awaitable], *args
+) -> None:
+    """Defers ``await func(*args)`` until ``session`` is committed through
+    ``commit``; cache invalidation goes here so that nothing can cache the old
+    rows again between the invalidation and the commit."""
+    session.info.setdefault("after_commit", []).append((func, args))
+
+
+async def commit(session: AsyncSession) -> None:
+    await session.commit()
+    for func, args in session.info.pop("after_commit", []):
+        await func(*args)
+
+
+def discard_after_commit(session: AsyncSession) -> None:
+    session.info.pop("after_commit", None)
+
+
+def create_engine(url: str = REAL_DB_URL) -> AsyncEngine:
+    engine_kwargs = {
+        "echo": DB_ECHO,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "query_cache_size": DB_STATEMENT_CACHE_SIZE,
+    }
+    db_url = make_url(url)
+    if db_url.get_backend_name() != "sqlite":
+        engine_kwargs.update(
+            poolclass=InstrumentedAsyncQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+    if db_url.get_driver_name() == "asyncpg":
+        cache_size = (
+            DB_PREPARED_STATEMENT_CACHE_SIZE if DB_PREPARED_STATEMENT_CACHE else 0
+        )
+        engine_kwargs["connect_args"] = {
+            "prepared_statement_cache_size": cache_size,
+            "statement_cache_size": cache_size,
+        }
+    return create_async_engine(db_url, **engine_kwargs)
+
+
+def init_engine(
+    url: str = REAL_DB_URL, replica_urls: list[str] = DB_REPLICA_URLS
+) -> AsyncEngine:
+    global engine
+    if engine is None:
+        engine = create_engine(url)
+        async_session.configure(bind=engine)
+        for replica_url in replica_urls:
+            replica_router.add(create_engine(replica_url))
+    return engine
+
 
-async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+async def dispose_engine() -> None:
+    global engine
+    if engine is not None:
+        await engine.dispose()
+        await replica_router.dispose()
+        engine = None
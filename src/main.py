@@ -1,11 +1,52 @@
-import uvicorn
+from contextlib import asynccontextmanager
+
+from api.responses import FastJSONResponse
 from api.routes.login import login_router
 from api.routes.task import task_router
 from api.routes.user import user_router
+from core.archive import task_archiver
+from core.events import task_events
+from core.metrics import instrument_engine
+from core.metrics import instrument_pool
+from core.metrics import mark_process_dead
+from core.metrics import metrics
+from core.metrics import PrometheusASGIMiddleware
+from core.query_counter import install_query_counter
+from core.query_counter import QueryCounterMiddleware
+from core.read_your_writes import ReadYourWritesMiddleware
+from db.session import dispose_engine
+from db.session import init_engine
+from db.session import replica_router
 from fastapi import FastAPI
+from utils.auth.hashing import async_hasher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    engine = init_engine()
+    engines = {"primary": engine}
+    for n, replica in enumerate(replica_router.engines):
+        engines[f"replica{n}"] = replica
+    for name, instrumented in engines.items():
+        instrument_engine(instrumented)
+        instrument_pool(name, instrumented)
+        install_query_counter(instrumented)
+    task_events.start(engine)
+    task_archiver.start()
+    yield
+    await task_archiver.stop()
+    await task_events.stop()
+    await dispose_engine()
+    async_hasher.shutdown()
+    mark_process_dead()
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryCounterMiddleware)
+app.add_middleware(PrometheusASGIMiddleware)
+app.add_route("/metrics", metrics, include_in_schema=False)
 
 
 app.include_router(login_router, prefix="/login", tags=["Login"])
@@ -14,4 +55,6 @@ app.include_router(task_router, prefix="/task", tags=["Task"])
 
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    from serve import main
+
+    main(["--dev"])
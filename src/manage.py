@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import sys
+import time
+from typing import Union
+
+from core.archive import archive_tasks
+from core.config import TASK_ARCHIVE_AFTER_SECONDS
+from core.config import TASK_ARCHIVE_BATCH_SIZE
+from core.config import TASK_ARCHIVE_PAUSE_SECONDS
+from db.session import async_session
+from db.session import dispose_engine
+from db.session import init_engine
+from repositories.DALs.taskStatsDAL import TaskStatsDAL
+
+
+DESCRIPTION = """Maintenance commands for the ToDo database::
+
+    cd src
+    python manage.py task-stats check --limit 20
+    python manage.py task-stats rebuild
+    python manage.py archive-tasks --older-than 604800 --batch-size 1000
+
+``archive-tasks`` moves old inactive tasks to the archive tables and reports
+throughput per batch. ``task-stats check`` compares the per-user status counters behind
+``GET /user/stats`` with a fresh count over the task tables and exits with
+status 1 when they differ; ``--fix`` rebuilds them in that case.
+"""
+
+
+async def rebuild_task_stats() -> int:
+    async with async_session() as session:
+        async with session.begin():
+            start = time.perf_counter()
+            rows = await TaskStatsDAL(session).rebuild()
+    print(f"rebuilt {rows} task status counters in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+async def check_task_stats(limit: int, fix: bool) -> int:
+    async with async_session() as session:
+        async with session.begin():
+            mismatches = await TaskStatsDAL(session).find_mismatches(limit=limit)
+    for row in mismatches:
+        print(
+            f"{row.user_id} {row.role} {row.status}: "
+            f"stored {row.stored}, counted {row.computed}"
+        )
+    if not mismatches:
+        print("task status counters are consistent")
+        return 0
+    if fix:
+        return await rebuild_task_stats()
+    return 1
+
+
+async def run_archive(
+    batch_size: int,
+    older_than_seconds: float,
+    pause_seconds: float,
+    max_batches: Union[int, None],
+) -> int:
+    start = time.perf_counter()
+    tasks = links = 0
+    async for batch in archive_tasks(
+        batch_size=batch_size,
+        older_than_seconds=older_than_seconds,
+        pause_seconds=pause_seconds,
+        max_batches=max_batches,
+    ):
+        tasks += batch.tasks
+        links += batch.links
+        print(
+            f"archived {batch.tasks} tasks, {batch.links} links in "
+            f"{batch.seconds:.2f}s ({batch.tasks / batch.seconds:.0f} tasks/s)"
+        )
+    elapsed = time.perf_counter() - start
+    print(
+        f"archived {tasks} tasks, {links} links in {elapsed:.2f}s "
+        f"({tasks / elapsed:.0f} tasks/s overall)"
+    )
+    return 0
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python manage.py", description=DESCRIPTION)
+    commands = parser.add_subparsers(dest="command", required=True)
+    task_stats = commands.add_parser("task-stats", help="per-user task counters")
+    task_stats_commands = task_stats.add_subparsers(dest="action", required=True)
+    task_stats_commands.add_parser("rebuild", help="recount every user's tasks")
+    check = task_stats_commands.add_parser("check", help="report drifted counters")
+    check.add_argument("--limit", type=int, default=100, help="mismatches to list")
+    check.add_argument("--fix", action="store_true", help="rebuild on mismatch")
+    archive = commands.add_parser("archive-tasks", help="archive old inactive tasks")
+    archive.add_argument("--batch-size", type=int, default=TASK_ARCHIVE_BATCH_SIZE)
+    archive.add_argument(
+        "--older-than",
+        type=float,
+        default=TASK_ARCHIVE_AFTER_SECONDS,
+        help="seconds a task has been inactive and unchanged",
+    )
+    archive.add_argument(
+        "--pause",
+        type=float,
+        default=TASK_ARCHIVE_PAUSE_SECONDS,
+        help="seconds to wait between batches",
+    )
+    archive.add_argument("--max-batches", type=int, help="stop after this many")
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> int:
+    init_engine()
+    try:
+        if args.command == "archive-tasks":
+            return await run_archive(
+                batch_size=args.batch_size,
+                older_than_seconds=args.older_than,
+                pause_seconds=args.pause,
+                max_batches=args.max_batches,
+            )
+        if args.action == "rebuild":
+            return await rebuild_task_stats()
+        return await check_task_stats(limit=args.limit, fix=args.fix)
+    finally:
+        await dispose_engine()
+
+
+def main(argv=None) -> int:
+    return asyncio.run(run(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""add_row_version
+
+Revision ID: 3f7a9c2e5b1d
+Revises: a8b2d4f6c1e3
+Create Date: 2026-10-20 10:26:14.803157
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f7a9c2e5b1d'
+down_revision: Union[str, None] = 'a8b2d4f6c1e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ('users', 'tasks', 'tasks_archive')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A constant default only touches the catalog, so existing rows start at
+    # version 1 without a table rewrite.
+    for table in VERSIONED_TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in VERSIONED_TABLES:
+        op.drop_column(table, 'version')
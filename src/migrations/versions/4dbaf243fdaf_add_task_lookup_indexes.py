@@ -0,0 +1,37 @@
+"""add_task_lookup_indexes
+
+Revision ID: 4dbaf243fdaf
+Revises: dffaaff0c2b3
+Create Date: 2026-10-18 09:12:40.381227
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4dbaf243fdaf'
+down_revision: Union[str, None] = 'dffaaff0c2b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_user_created_tasks_task_id_user_id', 'user_created_tasks', ['task_id', 'user_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_user_assigned_tasks_task_id_user_id', 'user_assigned_tasks', ['task_id', 'user_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_tasks_active_created_at', 'tasks', ['created_at', 'task_id'], unique=False, postgresql_where=sa.text('is_active'), postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_users_active_email', 'users', ['email'], unique=False, postgresql_where=sa.text('is_active'), postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_active_email', table_name='users', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_tasks_active_created_at', table_name='tasks', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_user_assigned_tasks_task_id_user_id', table_name='user_assigned_tasks', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_user_created_tasks_task_id_user_id', table_name='user_created_tasks', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,33 @@
+"""drop_task_status_created_at_index
+
+Revision ID: 7c4e1b9d3a6f
+Revises: 3f7a9c2e5b1d
+Create Date: 2026-10-20 11:48:37.265904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c4e1b9d3a6f'
+down_revision: Union[str, None] = '3f7a9c2e5b1d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Listings walk the link tables' (user_id, created_at, task_id) indexes and
+    # status counts come from task_status_counts, so nothing reads this index
+    # any more; it only slowed down status changes and archiving.
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tasks_status_created_at', table_name='tasks', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tasks_status_created_at', 'tasks', ['status', 'created_at', 'task_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
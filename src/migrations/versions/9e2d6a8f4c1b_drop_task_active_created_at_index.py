@@ -0,0 +1,32 @@
+"""drop_task_active_created_at_index
+
+Revision ID: 9e2d6a8f4c1b
+Revises: 7c4e1b9d3a6f
+Create Date: 2026-10-20 12:05:19.640372
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e2d6a8f4c1b'
+down_revision: Union[str, None] = '7c4e1b9d3a6f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Task pages are ordered on the link tables' own created_at now, so no
+    # query walks the active tasks by creation time any more.
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tasks_active_created_at', table_name='tasks', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tasks_active_created_at', 'tasks', ['created_at', 'task_id'], unique=False, postgresql_where=sa.text('is_active'), postgresql_concurrently=True, if_not_exists=True)
@@ -0,0 +1,99 @@
+"""add_archived_link_created_at
+
+Revision ID: a8b2d4f6c1e3
+Revises: f6a1c9d2e8b4
+Create Date: 2026-10-19 14:03:52.117406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8b2d4f6c1e3'
+down_revision: Union[str, None] = 'f6a1c9d2e8b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LINK_TABLES = ('user_created_tasks_archive', 'user_assigned_tasks_archive')
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Same steps as for the live link tables in f6a1c9d2e8b4: the archive
+    # keeps growing, so created_at is backfilled in committed batches while a
+    # trigger fills it for rows the archiver inserts without one.
+    op.execute("""
+        CREATE FUNCTION task_archive_links_fill_created_at() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.created_at IS NULL THEN
+                SELECT coalesce(created_at, now()) INTO NEW.created_at
+                FROM tasks_archive WHERE task_id = NEW.task_id;
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for table in LINK_TABLES:
+        op.add_column(table, sa.Column('created_at', sa.DateTime(timezone=True), nullable=True))
+        op.execute(f"""
+            CREATE TRIGGER {table}_fill_created_at BEFORE INSERT ON {table}
+            FOR EACH ROW EXECUTE FUNCTION task_archive_links_fill_created_at()
+        """)
+    with op.get_context().autocommit_block():
+        for table in LINK_TABLES:
+            # Walks the (user_id, task_id) primary key, committing after every
+            # batch.
+            op.execute(f"""
+                DO $$
+                DECLARE
+                    last_user uuid := '00000000-0000-0000-0000-000000000000';
+                    last_task uuid := '00000000-0000-0000-0000-000000000000';
+                    batch_end record;
+                BEGIN
+                    LOOP
+                        SELECT user_id, task_id INTO batch_end FROM (
+                            SELECT user_id, task_id FROM {table}
+                            WHERE (user_id, task_id) > (last_user, last_task)
+                            ORDER BY user_id, task_id LIMIT {BACKFILL_BATCH_SIZE}
+                        ) AS batch
+                        ORDER BY user_id DESC, task_id DESC LIMIT 1;
+                        EXIT WHEN NOT FOUND;
+                        UPDATE {table} AS link
+                        SET created_at = coalesce(tasks_archive.created_at, now())
+                        FROM tasks_archive
+                        WHERE tasks_archive.task_id = link.task_id
+                            AND (link.user_id, link.task_id) > (last_user, last_task)
+                            AND (link.user_id, link.task_id)
+                                <= (batch_end.user_id, batch_end.task_id)
+                            AND link.created_at IS NULL;
+                        last_user := batch_end.user_id;
+                        last_task := batch_end.task_id;
+                        COMMIT;
+                    END LOOP;
+                END
+                $$
+            """)
+            op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_created_at_not_null CHECK (created_at IS NOT NULL) NOT VALID')
+            op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {table}_created_at_not_null')
+    for table in LINK_TABLES:
+        op.execute(f'DROP TRIGGER {table}_fill_created_at ON {table}')
+        op.alter_column(table, 'created_at', nullable=False)
+        op.drop_constraint(f'{table}_created_at_not_null', table, type_='check')
+    op.execute('DROP FUNCTION task_archive_links_fill_created_at()')
+    with op.get_context().autocommit_block():
+        for table in LINK_TABLES:
+            op.create_index(f'ix_{table}_user_id_created_at', table, ['user_id', sa.text('created_at DESC'), sa.text('task_id DESC')], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for table in LINK_TABLES:
+            op.drop_index(f'ix_{table}_user_id_created_at', table_name=table, postgresql_concurrently=True, if_exists=True)
+    for table in LINK_TABLES:
+        op.drop_column(table, 'created_at')
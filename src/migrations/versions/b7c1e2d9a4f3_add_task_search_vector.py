@@ -0,0 +1,35 @@
+"""add_task_search_vector
+
+Revision ID: b7c1e2d9a4f3
+Revises: 4dbaf243fdaf
+Create Date: 2026-10-18 14:03:11.528804
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c1e2d9a4f3'
+down_revision: Union[str, None] = '4dbaf243fdaf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A stored generated column rewrites the table once; Postgres keeps it in
+    # sync with "task" from then on.
+    op.add_column('tasks', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed("to_tsvector('english', coalesce(task, ''))", persisted=True), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tasks_search_vector', 'tasks', ['search_vector'], unique=False, postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tasks_search_vector', table_name='tasks', postgresql_using='gin', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('tasks', 'search_vector')
@@ -0,0 +1,50 @@
+"""add_task_status_counts
+
+Revision ID: c3d8f1a2b5e7
+Revises: b7c1e2d9a4f3
+Create Date: 2026-10-18 16:41:27.093512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d8f1a2b5e7'
+down_revision: Union[str, None] = 'b7c1e2d9a4f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('task_status_counts',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('role', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'role', 'status')
+    )
+    # Same counting rule as TaskStatsDAL.rebuild: active tasks plus completed
+    # ones. The lock keeps task writes from slipping past the backfill.
+    op.execute('LOCK TABLE tasks IN SHARE MODE')
+    op.execute("""
+        INSERT INTO task_status_counts (user_id, role, status, count)
+        SELECT link.user_id, link.role, tasks.status, count(*)
+        FROM (
+            SELECT user_id, task_id, 'created' AS role FROM user_created_tasks
+            UNION ALL
+            SELECT user_id, task_id, 'assigned' AS role FROM user_assigned_tasks
+        ) AS link
+        JOIN tasks ON tasks.task_id = link.task_id
+        WHERE tasks.is_active OR tasks.status = 'Completed'
+        GROUP BY link.user_id, link.role, tasks.status
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('task_status_counts')
@@ -0,0 +1,61 @@
+"""add_task_archive
+
+Revision ID: d4e9a7b3c6f1
+Revises: c3d8f1a2b5e7
+Create Date: 2026-10-18 18:22:05.617340
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e9a7b3c6f1'
+down_revision: Union[str, None] = 'c3d8f1a2b5e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tasks_archive',
+    sa.Column('task_id', sa.UUID(), nullable=False),
+    sa.Column('task', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('task_id')
+    )
+    op.create_table('user_created_tasks_archive',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('task_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['task_id'], ['tasks_archive.task_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'task_id')
+    )
+    op.create_index('ix_user_created_tasks_archive_task_id', 'user_created_tasks_archive', ['task_id'], unique=False)
+    op.create_table('user_assigned_tasks_archive',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('task_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['task_id'], ['tasks_archive.task_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'task_id')
+    )
+    op.create_index('ix_user_assigned_tasks_archive_task_id', 'user_assigned_tasks_archive', ['task_id'], unique=False)
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tasks_inactive_version', 'tasks', [sa.text('coalesce(updated_at, created_at)')], unique=False, postgresql_where=sa.text('NOT is_active'), postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tasks_inactive_version', table_name='tasks', postgresql_concurrently=True, if_exists=True)
+    op.drop_index('ix_user_assigned_tasks_archive_task_id', table_name='user_assigned_tasks_archive')
+    op.drop_table('user_assigned_tasks_archive')
+    op.drop_index('ix_user_created_tasks_archive_task_id', table_name='user_created_tasks_archive')
+    op.drop_table('user_created_tasks_archive')
+    op.drop_table('tasks_archive')
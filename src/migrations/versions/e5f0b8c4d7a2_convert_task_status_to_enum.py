@@ -0,0 +1,95 @@
+"""convert_task_status_to_enum
+
+Revision ID: e5f0b8c4d7a2
+Revises: d4e9a7b3c6f1
+Create Date: 2026-10-18 20:07:48.214906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f0b8c4d7a2'
+down_revision: Union[str, None] = 'd4e9a7b3c6f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+task_status = postgresql.ENUM('Zero', 'Active', 'Verify', 'Completed', name='task_status')
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # "tasks" can be large, so instead of ALTER COLUMN ... TYPE (a rewrite
+    # under an exclusive lock) the enum goes into a new column: a trigger keeps
+    # it in step with writes while existing rows are backfilled in committed
+    # batches, then the columns are swapped.
+    task_status.create(op.get_bind(), checkfirst=True)
+    op.add_column('tasks', sa.Column('status_new', task_status, nullable=True))
+    op.execute("""
+        CREATE FUNCTION tasks_sync_status_new() RETURNS trigger AS $$
+        BEGIN
+            NEW.status_new := coalesce(NEW.status, 'Zero')::task_status;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER tasks_sync_status_new BEFORE INSERT OR UPDATE ON tasks
+        FOR EACH ROW EXECUTE FUNCTION tasks_sync_status_new()
+    """)
+    with op.get_context().autocommit_block():
+        # Walks the primary key, committing after every batch.
+        op.execute(f"""
+            DO $$
+            DECLARE
+                last_id uuid := '00000000-0000-0000-0000-000000000000';
+                batch_end uuid;
+            BEGIN
+                LOOP
+                    SELECT task_id INTO batch_end FROM (
+                        SELECT task_id FROM tasks WHERE task_id > last_id
+                        ORDER BY task_id LIMIT {BACKFILL_BATCH_SIZE}
+                    ) AS batch
+                    ORDER BY task_id DESC LIMIT 1;
+                    EXIT WHEN batch_end IS NULL;
+                    UPDATE tasks
+                    SET status_new = coalesce(status, 'Zero')::task_status
+                    WHERE task_id > last_id AND task_id <= batch_end
+                        AND status_new IS NULL;
+                    last_id := batch_end;
+                    COMMIT;
+                END LOOP;
+            END
+            $$
+        """)
+        # Validating a NOT VALID check does not block writes, and lets SET NOT
+        # NULL below skip its own full scan.
+        op.execute('ALTER TABLE tasks ADD CONSTRAINT tasks_status_new_not_null CHECK (status_new IS NOT NULL) NOT VALID')
+        op.execute('ALTER TABLE tasks VALIDATE CONSTRAINT tasks_status_new_not_null')
+    op.execute('DROP TRIGGER tasks_sync_status_new ON tasks')
+    op.execute('DROP FUNCTION tasks_sync_status_new()')
+    op.drop_column('tasks', 'status')
+    op.alter_column('tasks', 'status_new', new_column_name='status', nullable=False, server_default='Zero')
+    op.drop_constraint('tasks_status_new_not_null', 'tasks', type_='check')
+    # The archive and the counters are small next to "tasks" and are
+    # converted in place.
+    op.alter_column('tasks_archive', 'status', type_=task_status, nullable=False, postgresql_using="coalesce(status, 'Zero')::task_status")
+    op.alter_column('task_status_counts', 'status', type_=task_status, postgresql_using='status::task_status')
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tasks_status_created_at', 'tasks', ['status', 'created_at', 'task_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tasks_status_created_at', table_name='tasks', postgresql_concurrently=True, if_exists=True)
+    op.alter_column('task_status_counts', 'status', type_=sa.String(), postgresql_using='status::text')
+    op.alter_column('tasks_archive', 'status', type_=sa.String(), nullable=True, postgresql_using='status::text')
+    op.alter_column('tasks', 'status', type_=sa.String(), nullable=True, server_default=None, postgresql_using='status::text')
+    task_status.drop(op.get_bind(), checkfirst=True)
@@ -1,5 +1,8 @@
+import uuid
+
 from passlib.context import CryptContext
 from pydantic import BaseModel
+from pydantic import ConfigDict
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -18,3 +21,11 @@ class Hasher:
 class Token(BaseModel):
     access_token: str
     token_type: str
+
+
+class Principal(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    user_id: uuid.UUID
+    email: str
+    is_active: bool
@@ -1,18 +1,40 @@
 import uuid
+from collections import Counter
+from enum import Enum
 from typing import Optional
 
+from core.config import TASK_BULK_MAX_ITEMS
+from db.models import Status
 from models.schemas.base import TunedModel
 from pydantic import BaseModel
+from pydantic import Field
+from pydantic import field_validator
+
+
+def _check_unique_task_ids(task_ids: list[uuid.UUID]) -> None:
+    duplicates = [task_id for task_id, count in Counter(task_ids).items() if count > 1]
+    if duplicates:
+        raise ValueError(f"Duplicate task ids: {', '.join(map(str, duplicates))}.")
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
 
 
 class ShowTask(TunedModel):
     task_id: uuid.UUID
     task: str
-    status: str
+    status: Status
     # authors: list[uuid.UUID]
     # producers: list[uuid.UUID]
 
 
+class TaskPage(BaseModel):
+    items: list[ShowTask]
+    next_cursor: Optional[str] = None
+
+
 class CreateTask(BaseModel):
     producers_ids: list[uuid.UUID]
     task: str
@@ -32,3 +54,43 @@ class DeletedTaskResponse(BaseModel):
 
 class RestoredTaskResponse(BaseModel):
     restored_task_id: uuid.UUID
+
+
+class BulkCreateTasks(BaseModel):
+    tasks: list[CreateTask] = Field(min_length=1, max_length=TASK_BULK_MAX_ITEMS)
+
+
+class BulkUpdateTaskItem(UpdateTaskRequest):
+    task_id: uuid.UUID
+
+
+class BulkUpdateTasks(BaseModel):
+    tasks: list[BulkUpdateTaskItem] = Field(
+        min_length=1, max_length=TASK_BULK_MAX_ITEMS
+    )
+
+    @field_validator("tasks")
+    @classmethod
+    def unique_task_ids(cls, tasks: list[BulkUpdateTaskItem]):
+        _check_unique_task_ids([item.task_id for item in tasks])
+        return tasks
+
+
+class BulkDeleteTasks(BaseModel):
+    task_ids: list[uuid.UUID] = Field(min_length=1, max_length=TASK_BULK_MAX_ITEMS)
+
+    @field_validator("task_ids")
+    @classmethod
+    def unique_task_ids(cls, task_ids: list[uuid.UUID]):
+        _check_unique_task_ids(task_ids)
+        return task_ids
+
+
+class BulkTaskResult(BaseModel):
+    task_id: Optional[uuid.UUID] = None
+    ok: bool
+    detail: Optional[str] = None
+
+
+class BulkTaskResponse(BaseModel):
+    results: list[BulkTaskResult]
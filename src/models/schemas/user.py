@@ -32,3 +32,9 @@ class UpdatedUserResponse(BaseModel):
 
 class DeletedUserResponse(BaseModel):
     deleted_user_id: uuid.UUID
+
+
+class UserTaskStats(BaseModel):
+    user_id: uuid.UUID
+    created: dict[str, int]
+    assigned: dict[str, int]
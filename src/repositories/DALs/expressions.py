@@ -0,0 +1,59 @@
+from typing import Iterable
+
+from sqlalchemy import bindparam
+from sqlalchemy import ColumnElement
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import Values
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import NullType
+
+
+class _EqualsAny(FunctionElement):
+    name = "equals_any"
+    type = NullType()
+    inherit_cache = True
+
+
+@compiles(_EqualsAny, "postgresql")
+def _compile_equals_any_postgresql(element, compiler, **kw):
+    column, values = element.clauses
+    return f"{compiler.process(column, **kw)} = ANY({compiler.process(values, **kw)})"
+
+
+@compiles(_EqualsAny)
+def _compile_equals_any(element, compiler, **kw):
+    # Dialects without arrays (the SQLite stand-in used by the benchmarks)
+    # fall back to an expanding IN.
+    column, values = element.clauses
+    values = values._clone()
+    values.expanding = True
+    values.type = column.type
+    return f"{compiler.process(column, **kw)} IN {compiler.process(values, **kw)}"
+
+
+@compiles(Values, "sqlite")
+def _compile_values_sqlite(element, compiler, asfrom=False, **kw):
+    # SQLite cannot name the columns of a VALUES alias, so they are selected
+    # under their names from its numbered columns instead.
+    if not asfrom:
+        return compiler.visit_values(element, asfrom=asfrom, **kw)
+    rows = compiler._render_values(element, **kw)
+    columns = ", ".join(
+        f"column{n} AS {compiler.preparer.quote(column.name)}"
+        for n, column in enumerate(element.columns, 1)
+    )
+    alias = compiler.preparer.format_alias(element, element.name)
+    return f"(SELECT {columns} FROM ({rows})) AS {alias}"
+
+
+def equals_any(column, values: Iterable) -> ColumnElement[bool]:
+    # `column = ANY(:values)` binds a single array parameter, so the statement
+    # text (and its prepared statement) does not change with the list length.
+    return _EqualsAny(column, bindparam(None, list(values), type_=ARRAY(column.type)))
+
+
+def last_modified(model) -> ColumnElement:
+    # Rows that were never updated were last modified when created.
+    return func.coalesce(model.updated_at, model.created_at)
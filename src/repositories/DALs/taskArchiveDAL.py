@@ -0,0 +1,128 @@
+import uuid
+from datetime import datetime
+from typing import Union
+
+from core.metrics import instrument_dal
+from db.models import ArchivedTask
+from db.models import ArchivedUserAssignedTask
+from db.models import ArchivedUserCreatedTask
+from db.models import Task
+from db.models import UserAssignedTask
+from db.models import UserCreatedTask
+from repositories.DALs.expressions import equals_any
+from repositories.DALs.expressions import last_modified
+from sqlalchemy import and_
+from sqlalchemy import delete
+from sqlalchemy import insert
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# (live, archived) pairs of link tables.
+ARCHIVE_LINKS = (
+    (UserCreatedTask, ArchivedUserCreatedTask),
+    (UserAssignedTask, ArchivedUserAssignedTask),
+)
+
+ARCHIVE_TASK_COLUMNS = (
+    "task_id",
+    "task",
+    "status",
+    "is_active",
+    "created_at",
+    "updated_at",
+    "version",
+)
+
+
+@instrument_dal
+class TaskArchiveDAL:
+    def __init__(self, db_session: AsyncSession):
+        self.db_session = db_session
+
+    async def archive_tasks(self, cutoff: datetime, limit: int) -> tuple[int, int]:
+        """Move up to `limit` inactive tasks last changed before `cutoff`.
+
+        Returns how many tasks and link rows were moved.
+        """
+        # SKIP LOCKED lets several archivers run side by side and never waits
+        # on a task that a request is restoring.
+        query = (
+            select(Task.task_id)
+            .where(and_(Task.is_active.is_(False), last_modified(Task) < cutoff))
+            .order_by(last_modified(Task))
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        res = await self.db_session.execute(query)
+        task_ids = list(res.scalars())
+        if not task_ids:
+            return 0, 0
+        await self.db_session.execute(
+            insert(ArchivedTask).from_select(
+                ARCHIVE_TASK_COLUMNS,
+                select(
+                    *[getattr(Task, column) for column in ARCHIVE_TASK_COLUMNS]
+                ).where(equals_any(Task.task_id, task_ids)),
+            )
+        )
+        moved_links = 0
+        for live, archived in ARCHIVE_LINKS:
+            res = await self.db_session.execute(
+                insert(archived).from_select(
+                    ["user_id", "task_id", "created_at"],
+                    select(live.user_id, live.task_id, live.created_at).where(
+                        equals_any(live.task_id, task_ids)
+                    ),
+                )
+            )
+            moved_links += res.rowcount
+            await self.db_session.execute(
+                delete(live)
+                .where(equals_any(live.task_id, task_ids))
+                .execution_options(synchronize_session=False)
+            )
+        await self.db_session.execute(
+            delete(Task)
+            .where(equals_any(Task.task_id, task_ids))
+            .execution_options(synchronize_session=False)
+        )
+        return len(task_ids), moved_links
+
+    async def unarchive_task(self, task_id: uuid.UUID) -> Union[str, None]:
+        """Move an archived task back as it was; returns its status."""
+        # The link rows go first (they reference the archived task); their row
+        # locks also make a concurrent unarchive of the same task find nothing.
+        links = []
+        for live, archived in ARCHIVE_LINKS:
+            res = await self.db_session.execute(
+                delete(archived)
+                .where(archived.task_id == task_id)
+                .returning(archived.user_id, archived.created_at)
+            )
+            links.append((live, res.all()))
+        res = await self.db_session.execute(
+            delete(ArchivedTask)
+            .where(ArchivedTask.task_id == task_id)
+            .returning(
+                *[getattr(ArchivedTask, column) for column in ARCHIVE_TASK_COLUMNS]
+            )
+        )
+        archived_task = res.fetchone()
+        if archived_task is None:
+            return None
+        await self.db_session.execute(insert(Task).values(**archived_task._mapping))
+        for live, rows in links:
+            if rows:
+                await self.db_session.execute(
+                    insert(live),
+                    [
+                        {
+                            "user_id": row.user_id,
+                            "task_id": task_id,
+                            "created_at": row.created_at,
+                        }
+                        for row in rows
+                    ],
+                )
+        return archived_task.status
@@ -1,16 +1,180 @@
+import re
 import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Union
 
+from core.cache import task_cache
+from core.events import publish_task_events
+from core.metrics import instrument_dal
+from db.models import ArchivedTask
+from db.models import ArchivedUserAssignedTask
+from db.models import ArchivedUserCreatedTask
 from db.models import Status
+from db.models import STATUS_TRANSITIONS
+from db.models import STATUS_TYPE
 from db.models import Task
+from db.models import TASK_SEARCH_CONFIG
 from db.models import User
 from db.models import UserAssignedTask
 from db.models import UserCreatedTask
+from db.session import call_after_commit
+from repositories.DALs.expressions import equals_any
+from repositories.DALs.taskArchiveDAL import TaskArchiveDAL
+from repositories.DALs.taskStatsDAL import counted_status
+from repositories.DALs.taskStatsDAL import shift_status_counts
 from sqlalchemy import and_
+from sqlalchemy import case
+from sqlalchemy import column
+from sqlalchemy import exists
+from sqlalchemy import func
+from sqlalchemy import insert
+from sqlalchemy import literal
+from sqlalchemy import or_
+from sqlalchemy import RowMapping
 from sqlalchemy import select
+from sqlalchemy import tuple_
+from sqlalchemy import union
+from sqlalchemy import union_all
 from sqlalchemy import update
+from sqlalchemy import values
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncResult
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 
 
+def _is_author(user_id: uuid.UUID, task=Task, link=UserCreatedTask):
+    return exists().where(and_(link.task_id == task.task_id, link.user_id == user_id))
+
+
+def _is_producer(user_id: uuid.UUID, task=Task, link=UserAssignedTask):
+    return exists().where(and_(link.task_id == task.task_id, link.user_id == user_id))
+
+
+def _user_tasks_export_query(
+    user_id: uuid.UUID, since: Union[datetime, None], task, created, assigned
+):
+    # The union lets both link-table indexes pick the caller's tasks
+    # instead of probing every task with the EXISTS pair.
+    visible = union(
+        select(created.task_id).where(created.user_id == user_id),
+        select(assigned.task_id).where(assigned.user_id == user_id),
+    ).subquery()
+    query = select(
+        task.task_id,
+        task.task,
+        task.status,
+        task.is_active,
+        _is_author(user_id, task, created).label("is_author"),
+        _is_producer(user_id, task, assigned).label("is_producer"),
+        task.created_at,
+        task.updated_at,
+    ).join(visible, visible.c.task_id == task.task_id)
+    if since is not None:
+        # Rows that were never updated count as changed when created.
+        query = query.where(func.coalesce(task.updated_at, task.created_at) >= since)
+    return query
+
+
+PREVIOUS_STATUS = {
+    following: current for current, following in STATUS_TRANSITIONS.items()
+}
+
+
+def _user_tasks_page_query(
+    user_id: uuid.UUID,
+    task,
+    link,
+    limit: int,
+    after: Union[tuple[datetime, uuid.UUID], None],
+    status: Union[Status, None],
+    is_active: Union[bool, None],
+):
+    query = (
+        select(task.task_id, task.task, task.status, link.created_at)
+        .join(link, link.task_id == task.task_id)
+        .where(link.user_id == user_id)
+    )
+    if status is not None:
+        query = query.where(task.status == status)
+    if is_active is not None:
+        query = query.where(task.is_active.is_(is_active))
+    if after is not None:
+        query = query.where(tuple_(link.created_at, link.task_id) < tuple_(*after))
+    return query.order_by(link.created_at.desc(), link.task_id.desc()).limit(limit)
+
+
+def _merge_pages(queries: list, order_by: tuple[str, str], limit: int):
+    # Each query yields at most a page in order from its own index; only
+    # those rows are merged and cut down to one page.
+    merged = union_all(*[select(query.subquery()) for query in queries]).subquery()
+    return (
+        select(merged)
+        .order_by(*[merged.c[name].desc() for name in order_by])
+        .limit(limit)
+    )
+
+
+def _search_query(terms: str, prefix: bool):
+    config = literal(TASK_SEARCH_CONFIG, REGCONFIG)
+    if not prefix:
+        return func.websearch_to_tsquery(config, terms)
+    # Every word matches as a prefix ("deplo" finds "deployment"), which the
+    # GIN index serves just like whole words.
+    words = re.findall(r"\w+", terms)
+    return func.to_tsquery(config, " & ".join(f"{word}:*" for word in words))
+
+
+def _archived_search_query(
+    user_id: uuid.UUID,
+    ts_query,
+    limit: int,
+    after: Union[tuple[float, uuid.UUID], None],
+):
+    # The archive has no search_vector column or index: the caller's archived
+    # tasks are found through the link tables and matched on the fly, with the
+    # same expression the live column is computed from.
+    visible = union(
+        select(ArchivedUserCreatedTask.task_id).where(
+            ArchivedUserCreatedTask.user_id == user_id
+        ),
+        select(ArchivedUserAssignedTask.task_id).where(
+            ArchivedUserAssignedTask.user_id == user_id
+        ),
+    ).subquery()
+    search_vector = func.to_tsvector(
+        literal(TASK_SEARCH_CONFIG, REGCONFIG), func.coalesce(ArchivedTask.task, "")
+    )
+    rank = func.ts_rank_cd(search_vector, ts_query)
+    query = (
+        select(
+            ArchivedTask.task_id,
+            ArchivedTask.task,
+            ArchivedTask.status,
+            rank.label("rank"),
+        )
+        .join(visible, visible.c.task_id == ArchivedTask.task_id)
+        .where(search_vector.bool_op("@@")(ts_query))
+    )
+    if after is not None:
+        query = query.where(tuple_(rank, ArchivedTask.task_id) < tuple_(*after))
+    return query.order_by(rank.desc(), ArchivedTask.task_id.desc()).limit(limit)
+
+
+class UsersUnavailableError(ValueError):
+    def __init__(self, missing_ids: list[uuid.UUID], inactive_ids: list[uuid.UUID]):
+        self.missing_ids = missing_ids
+        self.inactive_ids = inactive_ids
+        details = []
+        if missing_ids:
+            details.append(f"Users not found: {', '.join(map(str, missing_ids))}.")
+        if inactive_ids:
+            details.append(f"Users inactive: {', '.join(map(str, inactive_ids))}.")
+        super().__init__(" ".join(details))
+
+
+@instrument_dal
 class TaskDAL:
     def __init__(self, db_session: AsyncSession):
         self.db_session = db_session
@@ -18,76 +182,439 @@ class TaskDAL:
     async def create_task(
         self, author_id: uuid.UUID, producers_ids: list[uuid.UUID], task: str
     ):
-        new_task = Task(task=task)
-        author = await self.db_session.get(User, author_id)
-        producers = [
-            await self.db_session.get(User, producer_id)
-            for producer_id in producers_ids
-        ]
+        producers_ids = list(dict.fromkeys(producers_ids))
+        if not producers_ids:
+            raise ValueError("At least one producer must be provided.")
+        await self._check_users_available({author_id, *producers_ids})
 
-        if not author or not producers:
-            raise ValueError("User not found")
+        res = await self.db_session.execute(
+            insert(Task)
+            .values(task=task, status=Status.Zero)
+            .returning(Task.task_id, Task.task, Task.status, Task.created_at)
+        )
+        new_task = res.one()
+        await self.db_session.execute(
+            insert(UserCreatedTask).values(
+                user_id=author_id,
+                task_id=new_task.task_id,
+                created_at=new_task.created_at,
+            )
+        )
+        await self.db_session.execute(
+            insert(UserAssignedTask).values(
+                [
+                    {
+                        "user_id": producer_id,
+                        "task_id": new_task.task_id,
+                        "created_at": new_task.created_at,
+                    }
+                    for producer_id in producers_ids
+                ]
+            )
+        )
+        await shift_status_counts(
+            self.db_session, [new_task.task_id], None, Status.Zero
+        )
+        await publish_task_events(self.db_session, "created", [new_task.task_id])
+        return new_task
+
+    async def create_tasks(self, author_id: uuid.UUID, tasks: list[dict]) -> None:
+        if not tasks:
+            return
+        res = await self.db_session.execute(
+            insert(Task).returning(Task.task_id, Task.created_at),
+            [
+                {
+                    "task_id": task["task_id"],
+                    "task": task["task"],
+                    "status": Status.Zero,
+                }
+                for task in tasks
+            ],
+        )
+        created_at = dict(res.tuples().all())
+        await self.db_session.execute(
+            insert(UserCreatedTask),
+            [
+                {
+                    "user_id": author_id,
+                    "task_id": task["task_id"],
+                    "created_at": created_at[task["task_id"]],
+                }
+                for task in tasks
+            ],
+        )
+        await self.db_session.execute(
+            insert(UserAssignedTask),
+            [
+                {
+                    "user_id": producer_id,
+                    "task_id": task["task_id"],
+                    "created_at": created_at[task["task_id"]],
+                }
+                for task in tasks
+                for producer_id in task["producers_ids"]
+            ],
+        )
+        task_ids = [task["task_id"] for task in tasks]
+        await shift_status_counts(self.db_session, task_ids, None, Status.Zero)
+        await publish_task_events(self.db_session, "created", task_ids)
 
-        new_task.authors.append(UserCreatedTask(user=author, task=new_task))
-        for producer in producers:
-            new_task.producers.append(UserAssignedTask(user=producer, task=new_task))
+    async def get_users_activity(
+        self, users_ids: set[uuid.UUID]
+    ) -> dict[uuid.UUID, bool]:
+        query = select(User.user_id, User.is_active).where(
+            equals_any(User.user_id, users_ids)
+        )
+        res = await self.db_session.execute(query)
+        return {row.user_id: row.is_active for row in res}
 
-        self.db_session.add(new_task)
-        await self.db_session.flush()
-        await self.db_session.refresh(new_task)
-        return new_task
+    async def _check_users_available(self, users_ids: set[uuid.UUID]) -> None:
+        found = await self.get_users_activity(users_ids)
+        missing_ids = [user_id for user_id in users_ids if user_id not in found]
+        inactive_ids = [user_id for user_id, active in found.items() if not active]
+        if missing_ids or inactive_ids:
+            raise UsersUnavailableError(missing_ids, inactive_ids)
 
-    async def update_task(self, task_id: uuid.UUID, **kwargs):
+    async def update_task(
+        self,
+        task_id: uuid.UUID,
+        *,
+        author_id: Union[uuid.UUID, None] = None,
+        expected_versions: Union[list[int], None] = None,
+        **kwargs,
+    ):
+        # Authorship and the If-Match version are checked by the UPDATE itself,
+        # so a successful write needs no read beforehand.
+        conditions = [Task.task_id == task_id, Task.is_active.is_(True)]
+        if author_id is not None:
+            conditions.append(_is_author(author_id))
+        if expected_versions is not None:
+            conditions.append(Task.version.in_(expected_versions))
         query = (
             update(Task)
-            .where(and_(Task.task_id == task_id, Task.is_active is True))
+            .where(and_(*conditions))
             .values(kwargs)
-            .returning(Task.task_id)
+            .returning(Task.task_id, Task.version)
+            .execution_options(synchronize_session=False)
         )
         res = await self.db_session.execute(query)
-        updated_task_id_row = res.fetchone()
-        if updated_task_id_row is not None:
-            return updated_task_id_row[0]
+        updated_task = res.fetchone()
+        if updated_task is not None:
+            call_after_commit(self.db_session, task_cache.delete, str(task_id))
+            await publish_task_events(self.db_session, "updated", [task_id])
+        return updated_task
 
     async def delete_task(self, task_id: uuid.UUID):
         query = (
             update(Task)
-            .where(and_(Task.task_id == task_id, Task.is_active is True))
+            .where(and_(Task.task_id == task_id, Task.is_active.is_(True)))
             .values(is_active=False)
-            .returning(Task.task_id)
+            .returning(Task.task_id, Task.status)
         )
         res = await self.db_session.execute(query)
-        deleted_task_id = res.fetchone()
-        if deleted_task_id is not None:
-            return deleted_task_id[0]
+        deleted_task = res.fetchone()
+        if deleted_task is not None:
+            call_after_commit(self.db_session, task_cache.delete, str(task_id))
+            await shift_status_counts(
+                self.db_session, [task_id], deleted_task.status, None
+            )
+            await publish_task_events(self.db_session, "deleted", [task_id])
+            return deleted_task.task_id
 
     async def restore_task(self, task_id: uuid.UUID):
+        # The previous status decides whether the task was counted (completed)
+        # or not (deleted); the row lock keeps it from changing meanwhile.
+        previous_status = await self.db_session.scalar(
+            select(Task.status)
+            .where(and_(Task.task_id == task_id, Task.is_active.is_(False)))
+            .with_for_update()
+        )
+        if previous_status is None:
+            # An archived task is moved back first, then restored as usual.
+            previous_status = await TaskArchiveDAL(self.db_session).unarchive_task(
+                task_id
+            )
+            if previous_status is None:
+                return
         query = (
             update(Task)
-            .where(and_(Task.task_id == task_id, Task.is_active is False))
+            .where(and_(Task.task_id == task_id, Task.is_active.is_(False)))
             .values(is_active=True, status=Status.Zero)
             .returning(Task.task_id)
         )
         res = await self.db_session.execute(query)
-        deleted_task_id = res.fetchone()
-        if deleted_task_id is not None:
-            return deleted_task_id[0]
+        restored_task_id = res.fetchone()
+        if restored_task_id is not None:
+            call_after_commit(self.db_session, task_cache.delete, str(task_id))
+            await shift_status_counts(
+                self.db_session,
+                [task_id],
+                counted_status(previous_status, False),
+                Status.Zero,
+            )
+            await publish_task_events(self.db_session, "restored", [task_id])
+            return restored_task_id[0]
 
-    async def get_task(self, task_id: uuid.UUID):
-        query = select(Task).where(
-            and_(Task.task_id == task_id, Task.is_active is True)
+    async def advance_task_status(
+        self,
+        task_id: uuid.UUID,
+        user_id: uuid.UUID,
+        expected_status: Status,
+    ):
+        # The whole state machine runs in one UPDATE. The caller names the
+        # status it saw, so of two concurrent advances from the same status
+        # only the first applies; the Completed transition (authors only)
+        # deactivates the task in place.
+        is_author = _is_author(user_id)
+        is_producer = _is_producer(user_id)
+        conditions = [
+            Task.task_id == task_id,
+            Task.is_active.is_(True),
+            Task.status.in_(list(STATUS_TRANSITIONS)),
+            or_(is_author, and_(Task.status != Status.Verify, is_producer)),
+            Task.status == expected_status,
+        ]
+        query = (
+            update(Task)
+            .where(and_(*conditions))
+            .values(
+                status=case(
+                    {
+                        current: literal(following, STATUS_TYPE)
+                        for current, following in STATUS_TRANSITIONS.items()
+                    },
+                    value=Task.status,
+                ),
+                is_active=case(
+                    (Task.status == Status.Verify, False),
+                    else_=Task.is_active,
+                ),
+            )
+            .returning(Task.task_id, Task.status, Task.is_active)
+            .execution_options(synchronize_session=False)
+        )
+        res = await self.db_session.execute(query)
+        advanced_task = res.fetchone()
+        if advanced_task is not None:
+            call_after_commit(self.db_session, task_cache.delete, str(task_id))
+            # The UPDATE applies exactly one transition, so the new status
+            # tells which one it was.
+            await shift_status_counts(
+                self.db_session,
+                [task_id],
+                PREVIOUS_STATUS[advanced_task.status],
+                counted_status(advanced_task.status, advanced_task.is_active),
+            )
+            await publish_task_events(self.db_session, "status", [task_id])
+        return advanced_task
+
+    async def get_task_status_access(self, task_id: uuid.UUID, user_id: uuid.UUID):
+        is_author = _is_author(user_id)
+        is_producer = _is_producer(user_id)
+        query = select(
+            Task.status,
+            Task.is_active,
+            is_author.label("is_author"),
+            is_producer.label("is_producer"),
+        ).where(Task.task_id == task_id)
+        res = await self.db_session.execute(query)
+        return res.fetchone()
+
+    async def get_task_version(self, task_id: uuid.UUID, user_id: uuid.UUID):
+        is_author = _is_author(user_id)
+        is_producer = _is_producer(user_id)
+        query = select(
+            Task.version,
+            or_(is_author, is_producer).label("has_access"),
+        ).where(and_(Task.task_id == task_id, Task.is_active.is_(True)))
+        res = await self.db_session.execute(query)
+        return res.fetchone()
+
+    async def get_task_with_access(
+        self, task_id: uuid.UUID, user_id: uuid.UUID
+    ) -> tuple[Union[Task, None], bool]:
+        is_author = _is_author(user_id)
+        is_producer = _is_producer(user_id)
+        query = (
+            select(Task, or_(is_author, is_producer).label("has_access"))
+            .where(and_(Task.task_id == task_id, Task.is_active.is_(True)))
+            .options(raiseload("*"))
         )
         res = await self.db_session.execute(query)
         task_row = res.fetchone()
-        if task_row is not None:
-            return task_row[0]
+        if task_row is None:
+            return None, False
+        return task_row[0], task_row[1]
+
+    async def get_tasks_authorship(
+        self, task_ids: list[uuid.UUID], user_id: uuid.UUID
+    ) -> dict[uuid.UUID, tuple[bool, bool]]:
+        is_author = _is_author(user_id)
+        query = select(
+            Task.task_id, Task.is_active, is_author.label("is_author")
+        ).where(equals_any(Task.task_id, task_ids))
+        res = await self.db_session.execute(query)
+        return {row.task_id: (row.is_active, row.is_author) for row in res}
+
+    async def update_tasks(self, updates: dict[uuid.UUID, dict]) -> list[uuid.UUID]:
+        # One UPDATE ... FROM (VALUES ...) per distinct set of updated columns;
+        # RETURNING reports the tasks that were still active when written.
+        groups = defaultdict(list)
+        for task_id, params in updates.items():
+            groups[tuple(sorted(params))].append(task_id)
+        tasks = Task.__table__
+        updated_task_ids = []
+        for fields, task_ids in groups.items():
+            rows = values(
+                *[column(name, tasks.c[name].type) for name in ("task_id", *fields)],
+                name="updates",
+            ).data(
+                [
+                    (task_id, *[updates[task_id][field] for field in fields])
+                    for task_id in task_ids
+                ]
+            )
+            query = (
+                update(tasks)
+                .where(
+                    and_(
+                        tasks.c.task_id == rows.c.task_id,
+                        tasks.c.is_active.is_(True),
+                    )
+                )
+                .values({field: rows.c[field] for field in fields})
+                .returning(tasks.c.task_id)
+            )
+            res = await self.db_session.execute(query)
+            updated_task_ids.extend(res.scalars())
+        call_after_commit(
+            self.db_session,
+            task_cache.delete,
+            *[str(task_id) for task_id in updated_task_ids],
+        )
+        await publish_task_events(self.db_session, "updated", updated_task_ids)
+        return updated_task_ids
+
+    async def delete_tasks(self, task_ids: list[uuid.UUID]) -> list[uuid.UUID]:
+        if not task_ids:
+            return []
+        query = (
+            update(Task)
+            .where(and_(equals_any(Task.task_id, task_ids), Task.is_active.is_(True)))
+            .values(is_active=False)
+            .returning(Task.task_id, Task.status)
+        )
+        res = await self.db_session.execute(query)
+        deleted_by_status = defaultdict(list)
+        for row in res:
+            deleted_by_status[row.status].append(row.task_id)
+        for status, status_task_ids in deleted_by_status.items():
+            await shift_status_counts(self.db_session, status_task_ids, status, None)
+        deleted_task_ids = [
+            task_id for ids in deleted_by_status.values() for task_id in ids
+        ]
+        call_after_commit(
+            self.db_session,
+            task_cache.delete,
+            *[str(task_id) for task_id in deleted_task_ids],
+        )
+        await publish_task_events(self.db_session, "deleted", deleted_task_ids)
+        return deleted_task_ids
 
     async def get_authors(self, task_id: uuid.UUID) -> list[uuid.UUID]:
-        task = await self.db_session.get(Task, task_id)
-        authors_ids = [author.user_id for author in task.authors]
-        return authors_ids
-
-    async def get_producers(self, task_id: uuid.UUID) -> list[uuid.UUID]:
-        task = await self.db_session.get(Task, task_id)
-        producers_ids = [producer.user_id for producer in task.producers]
-        return producers_ids
+        # Archived tasks keep their authors, so restoring (or deleting) one is
+        # authorized exactly as before it was archived.
+        query = union(
+            select(UserCreatedTask.user_id).where(UserCreatedTask.task_id == task_id),
+            select(ArchivedUserCreatedTask.user_id).where(
+                ArchivedUserCreatedTask.task_id == task_id
+            ),
+        )
+        res = await self.db_session.execute(query)
+        return list(res.scalars())
+
+    async def get_user_tasks(
+        self,
+        user_id: uuid.UUID,
+        assigned: bool,
+        limit: int,
+        after: Union[tuple[datetime, uuid.UUID], None] = None,
+        status: Union[Status, None] = None,
+        is_active: Union[bool, None] = None,
+    ) -> list[RowMapping]:
+        link = UserAssignedTask if assigned else UserCreatedTask
+        archived_link = (
+            ArchivedUserAssignedTask if assigned else ArchivedUserCreatedTask
+        )
+        # Plain column rows: pages go straight into the response without
+        # building ORM objects or models. The link table's (user_id,
+        # created_at, task_id) index yields the page in order, so a page costs
+        # the same however many tasks the user has.
+        query = _user_tasks_page_query(
+            user_id, Task, link, limit, after, status, is_active
+        )
+        if is_active is not True:
+            # Archived tasks are inactive ones too; their link tables carry the
+            # same index.
+            archived = _user_tasks_page_query(
+                user_id, ArchivedTask, archived_link, limit, after, status, None
+            )
+            query = _merge_pages([query, archived], ("created_at", "task_id"), limit)
+        res = await self.db_session.execute(query)
+        return list(res.mappings())
+
+    async def search_tasks(
+        self,
+        user_id: uuid.UUID,
+        terms: str,
+        limit: int,
+        prefix: bool = False,
+        after: Union[tuple[float, uuid.UUID], None] = None,
+        is_active: Union[bool, None] = None,
+    ) -> list[RowMapping]:
+        ts_query = _search_query(terms, prefix)
+        rank = func.ts_rank_cd(Task.search_vector, ts_query)
+        query = select(Task.task_id, Task.task, Task.status, rank.label("rank")).where(
+            and_(
+                Task.search_vector.bool_op("@@")(ts_query),
+                or_(_is_author(user_id), _is_producer(user_id)),
+            )
+        )
+        if is_active is not None:
+            query = query.where(Task.is_active.is_(is_active))
+        if after is not None:
+            query = query.where(tuple_(rank, Task.task_id) < tuple_(*after))
+        query = query.order_by(rank.desc(), Task.task_id.desc()).limit(limit)
+        if is_active is not True:
+            query = _merge_pages(
+                [query, _archived_search_query(user_id, ts_query, limit, after)],
+                ("rank", "task_id"),
+                limit,
+            )
+        res = await self.db_session.execute(query)
+        return list(res.mappings())
+
+    async def stream_user_tasks(
+        self,
+        user_id: uuid.UUID,
+        batch_size: int,
+        since: Union[datetime, None] = None,
+    ) -> AsyncResult:
+        # Archived tasks are part of the export; one statement keeps both
+        # halves on the same snapshot while the archiver runs.
+        query = union_all(
+            _user_tasks_export_query(
+                user_id, since, Task, UserCreatedTask, UserAssignedTask
+            ),
+            _user_tasks_export_query(
+                user_id,
+                since,
+                ArchivedTask,
+                ArchivedUserCreatedTask,
+                ArchivedUserAssignedTask,
+            ),
+        )
+        return await self.db_session.stream(
+            query.execution_options(yield_per=batch_size)
+        )
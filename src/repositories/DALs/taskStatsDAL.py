@@ -0,0 +1,181 @@
+import uuid
+from typing import Union
+
+from core.metrics import instrument_dal
+from db.models import ArchivedTask
+from db.models import ArchivedUserAssignedTask
+from db.models import ArchivedUserCreatedTask
+from db.models import Status
+from db.models import STATUS_TYPE
+from db.models import Task
+from db.models import TaskStatusCount
+from db.models import UserAssignedTask
+from db.models import UserCreatedTask
+from repositories.DALs.expressions import equals_any
+from sqlalchemy import and_
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import literal
+from sqlalchemy import or_
+from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy import union_all
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+TASK_ROLES = {"created": UserCreatedTask, "assigned": UserAssignedTask}
+
+ARCHIVED_TASK_ROLES = {
+    "created": ArchivedUserCreatedTask,
+    "assigned": ArchivedUserAssignedTask,
+}
+
+
+def counted_status(status: Status, is_active: bool) -> Union[Status, None]:
+    if is_active or status == Status.Completed:
+        return status
+    return None
+
+
+def _upsert_counts(session: AsyncSession, rows):
+    # Adds each row's count to the stored one, creating missing rows.
+    if session.get_bind().dialect.name == "sqlite":
+        insert = sqlite_insert
+    else:
+        insert = postgresql_insert
+    columns = ["user_id", "role", "status", "count"]
+    query = insert(TaskStatusCount).from_select(columns, rows)
+    return query.on_conflict_do_update(
+        index_elements=["user_id", "role", "status"],
+        set_={"count": TaskStatusCount.count + query.excluded.count},
+    )
+
+
+async def shift_status_counts(
+    session: AsyncSession,
+    task_ids: list[uuid.UUID],
+    from_status: Union[Status, None],
+    to_status: Union[Status, None],
+) -> None:
+    """Move tasks that share a status change between their users' counters.
+
+    A status of None means "not counted", e.g. a new or a deleted task.
+    """
+    if not task_ids or from_status == to_status:
+        return
+    selects = []
+    for role, link in TASK_ROLES.items():
+        for status, sign in ((from_status, -1), (to_status, 1)):
+            if status is None:
+                continue
+            selects.append(
+                select(
+                    link.user_id,
+                    literal(role).label("role"),
+                    literal(Status(status), STATUS_TYPE).label("status"),
+                    (func.count() * sign).label("count"),
+                )
+                .where(equals_any(link.task_id, task_ids))
+                .group_by(link.user_id)
+            )
+    # A fixed row order makes concurrent writers lock counters in the same
+    # order.
+    rows = union_all(*selects).subquery()
+    await session.execute(
+        _upsert_counts(
+            session,
+            select(rows).order_by(rows.c.user_id, rows.c.role, rows.c.status),
+        )
+    )
+
+
+def _computed_counts():
+    # Every active task counts, plus completed ones, including those that have
+    # been archived since.
+    selects = [
+        select(
+            link.user_id,
+            literal(role).label("role"),
+            task.status,
+            func.count().label("count"),
+        )
+        .join(task, task.task_id == link.task_id)
+        .where(or_(task.is_active.is_(True), task.status == Status.Completed))
+        .group_by(link.user_id, task.status)
+        for task, links in (
+            (Task, TASK_ROLES),
+            (ArchivedTask, ARCHIVED_TASK_ROLES),
+        )
+        for role, link in links.items()
+    ]
+    counts = union_all(*selects).subquery()
+    return (
+        select(
+            counts.c.user_id,
+            counts.c.role,
+            counts.c.status,
+            func.sum(counts.c.count).label("count"),
+        )
+        .group_by(counts.c.user_id, counts.c.role, counts.c.status)
+        .subquery("computed")
+    )
+
+
+@instrument_dal
+class TaskStatsDAL:
+    def __init__(self, db_session: AsyncSession):
+        self.db_session = db_session
+
+    async def get_user_counts(self, user_id: uuid.UUID) -> dict[str, dict[str, int]]:
+        query = select(
+            TaskStatusCount.role, TaskStatusCount.status, TaskStatusCount.count
+        ).where(TaskStatusCount.user_id == user_id)
+        res = await self.db_session.execute(query)
+        counts = {role: {} for role in TASK_ROLES}
+        for row in res:
+            counts[row.role][row.status] = row.count
+        return counts
+
+    async def find_mismatches(self, limit: Union[int, None] = None):
+        """Counters that differ from a fresh count over the link tables."""
+        computed = _computed_counts()
+        stored = TaskStatusCount.__table__
+        keys = and_(
+            stored.c.user_id == computed.c.user_id,
+            stored.c.role == computed.c.role,
+            stored.c.status == computed.c.status,
+        )
+        stored_count = func.coalesce(stored.c.count, 0)
+        computed_count = func.coalesce(computed.c.count, 0)
+        query = (
+            select(
+                func.coalesce(stored.c.user_id, computed.c.user_id).label("user_id"),
+                func.coalesce(stored.c.role, computed.c.role).label("role"),
+                func.coalesce(stored.c.status, computed.c.status).label("status"),
+                stored_count.label("stored"),
+                computed_count.label("computed"),
+            )
+            .select_from(stored.join(computed, keys, full=True))
+            .where(stored_count != computed_count)
+            .order_by("user_id", "role", "status")
+            .limit(limit)
+        )
+        res = await self.db_session.execute(query)
+        return res.fetchall()
+
+    async def rebuild(self) -> int:
+        """Recount every user's tasks from scratch; returns the rows written."""
+        if self.db_session.get_bind().dialect.name == "postgresql":
+            # Writers block on the counters until the recount commits, so
+            # none of their changes is counted twice or lost.
+            await self.db_session.execute(
+                text(f"LOCK TABLE {TaskStatusCount.__tablename__} IN EXCLUSIVE MODE")
+            )
+        await self.db_session.execute(delete(TaskStatusCount))
+        computed = _computed_counts()
+        res = await self.db_session.execute(
+            _upsert_counts(self.db_session, select(computed))
+        )
+        return res.rowcount
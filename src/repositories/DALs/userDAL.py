@@ -1,12 +1,22 @@
 import uuid
+from typing import Union
 
+from core.cache import user_cache
+from core.metrics import instrument_dal
 from db.models import User
+from db.models import UserAssignedTask
+from db.models import UserCreatedTask
+from db.session import call_after_commit
+from models.schemas.auth import Principal
 from sqlalchemy import and_
 from sqlalchemy import select
 from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
+from utils.auth.principal_cache import principal_cache
 
 
+@instrument_dal
 class UserDAL:
     def __init__(self, db_session: AsyncSession):
         self.db_session = db_session
@@ -17,59 +27,97 @@ class UserDAL:
         new_user = User(username=username, email=email, hashed_password=hashed_password)
         self.db_session.add(new_user)
         await self.db_session.flush()
-        await self.db_session.refresh(new_user, ["created_tasks", "assigned_tasks"])
         return new_user
 
-    async def update_user(self, user_id: uuid.UUID, **kwargs) -> uuid.UUID:
+    async def update_user(
+        self,
+        user_id: uuid.UUID,
+        *,
+        expected_versions: Union[list[int], None] = None,
+        **kwargs,
+    ):
+        conditions = [User.user_id == user_id, User.is_active.is_(True)]
+        if expected_versions is not None:
+            conditions.append(User.version.in_(expected_versions))
         query = (
             update(User)
-            .where(and_(User.user_id == user_id, User.is_active is True))
+            .where(and_(*conditions))
             .values(kwargs)
-            .returning(User.user_id)
+            .returning(User.user_id, User.version)
         )
         res = await self.db_session.execute(query)
-        updated_user_id_row = res.fetchone()
-        if updated_user_id_row is not None:
-            return updated_user_id_row[0]
+        updated_user = res.fetchone()
+        if updated_user is not None:
+            call_after_commit(self.db_session, principal_cache.invalidate_user, user_id)
+            call_after_commit(self.db_session, user_cache.delete, str(user_id))
+        return updated_user
 
     async def delete_user(self, user_id: uuid.UUID) -> uuid.UUID:
         query = (
             update(User)
-            .where(and_(User.user_id == user_id, User.is_active is True))
+            .where(and_(User.user_id == user_id, User.is_active.is_(True)))
             .values(is_active=False)
             .returning(User.user_id)
         )
         res = await self.db_session.execute(query)
         deleted_user_id = res.fetchone()
         if deleted_user_id is not None:
+            call_after_commit(self.db_session, principal_cache.invalidate_user, user_id)
+            call_after_commit(self.db_session, user_cache.delete, str(user_id))
             return deleted_user_id[0]
 
     async def get_user_by_id(self, user_id: uuid.UUID) -> User:
-        query = select(User).where(
-            and_(User.user_id == user_id, User.is_active is True)
+        query = (
+            select(User)
+            .where(and_(User.user_id == user_id, User.is_active.is_(True)))
+            .options(raiseload("*"))
         )
         res = await self.db_session.execute(query)
         user_row = res.fetchone()
         if user_row is not None:
             return user_row[0]
 
+    async def get_user_version(self, user_id: uuid.UUID) -> Union[int, None]:
+        query = select(User.version).where(
+            and_(User.user_id == user_id, User.is_active.is_(True))
+        )
+        res = await self.db_session.execute(query)
+        return res.scalar_one_or_none()
+
     async def get_user_by_email(self, email: str) -> User:
-        query = select(User).where(and_(User.email == email, User.is_active is True))
+        query = (
+            select(User)
+            .where(and_(User.email == email, User.is_active.is_(True)))
+            .options(raiseload("*"))
+        )
         res = await self.db_session.execute(query)
         user_row = res.fetchone()
         if user_row is not None:
             return user_row[0]
 
+    async def get_principal_by_email(self, email: str) -> Union[Principal, None]:
+        query = select(User.user_id, User.email, User.is_active).where(
+            and_(User.email == email, User.is_active.is_(True))
+        )
+        res = await self.db_session.execute(query)
+        principal_row = res.fetchone()
+        if principal_row is not None:
+            return Principal(
+                user_id=principal_row.user_id,
+                email=principal_row.email,
+                is_active=principal_row.is_active,
+            )
+
     async def get_created_tasks(self, user_id: uuid.UUID) -> list[uuid.UUID]:
-        user = await self.db_session.get(User, user_id)
-        created_tasks_ids = [
-            created_task.task_id for created_task in user.created_tasks
-        ]
-        return created_tasks_ids
+        query = select(UserCreatedTask.task_id).where(
+            UserCreatedTask.user_id == user_id
+        )
+        res = await self.db_session.execute(query)
+        return list(res.scalars())
 
     async def get_assigned_tasks(self, user_id: uuid.UUID) -> list[uuid.UUID]:
-        user = await self.db_session.get(User, user_id)
-        assigned_tasks_ids = [
-            assigned_task.task_id for assigned_task in user.assigned_tasks
-        ]
-        return assigned_tasks_ids
+        query = select(UserAssignedTask.task_id).where(
+            UserAssignedTask.user_id == user_id
+        )
+        res = await self.db_session.execute(query)
+        return list(res.scalars())
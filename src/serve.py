@@ -0,0 +1,105 @@
+import argparse
+import importlib.util
+import math
+import os
+import tempfile
+
+import uvicorn
+from core.config import CACHE_BACKEND
+from core.config import SERVER_ACCESS_LOG
+from core.config import SERVER_BACKLOG
+from core.config import SERVER_GRACEFUL_SHUTDOWN_SECONDS
+from core.config import SERVER_HOST
+from core.config import SERVER_KEEP_ALIVE_SECONDS
+from core.config import SERVER_LIMIT_CONCURRENCY
+from core.config import SERVER_PORT
+from core.config import SERVER_WORKERS
+
+
+DESCRIPTION = """Runs the API under uvicorn.
+
+``python serve.py`` starts the production server: one worker process per CPU
+when CACHE_BACKEND=shared (a single one otherwise), uvloop and httptools when
+they are installed, no reloader. ``python serve.py
+--dev`` (or ``python main.py``) starts a single process that reloads on code
+changes.
+"""
+
+
+def available_cpus() -> int:
+    # os.cpu_count() reports the host; a container may be limited by a cgroup
+    # quota or by CPU affinity.
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return max(1, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def default_workers() -> int:
+    # The memory cache backend keeps cached tasks, users, principals and
+    # read-your-writes pins per process, so only the shared backend can serve
+    # several workers.
+    return available_cpus() if CACHE_BACKEND == "shared" else 1
+
+
+def prepare_metrics_dir() -> None:
+    # Workers write their metrics to files in PROMETHEUS_MULTIPROC_DIR and
+    # /metrics adds them up; files left by an earlier run would be counted too.
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path is None:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="metrics-")
+        return
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        if name.endswith(".db"):
+            os.remove(os.path.join(path, name))
+
+
+def production_options(workers: int) -> dict:
+    return {
+        "workers": workers or default_workers(),
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        "backlog": SERVER_BACKLOG,
+        "timeout_keep_alive": SERVER_KEEP_ALIVE_SECONDS,
+        "timeout_graceful_shutdown": SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        "limit_concurrency": SERVER_LIMIT_CONCURRENCY or None,
+        "access_log": SERVER_ACCESS_LOG,
+        "server_header": False,
+    }
+
+
+def dev_options() -> dict:
+    return {"reload": True}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument("--dev", action="store_true", help="single process, reload")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    args = parser.parse_args(argv)
+    if args.workers > 1 and CACHE_BACKEND != "shared":
+        parser.error("several workers need CACHE_BACKEND=shared")
+
+    options = dev_options() if args.dev else production_options(args.workers)
+    if options.get("workers", 1) > 1:
+        prepare_metrics_dir()
+    # Each worker runs the app lifespan, which drains its event listener and
+    # disposes its engine once in-flight requests are done.
+    uvicorn.run("main:app", host=args.host, port=args.port, **options)
+
+
+if __name__ == "__main__":
+    main()
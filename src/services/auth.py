@@ -1,27 +1,98 @@
+import uuid
+from typing import Protocol
 from typing import Union
 
 from core.config import ACCESS_TOKEN_ALGORITHM
 from core.config import ACCESS_TOKEN_SECRET_KEY
-from core.dependencies.get_db import get_db
+from core.config import AUTH_PRINCIPAL_RESOLVER
+from core.dependencies.get_db import get_read_db
 from db.models import User
+from db.session import is_replica
+from db.session import release_connection
 from fastapi import Depends
 from fastapi import HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from jose import JWTError
-from models.schemas.auth import Hasher
+from models.schemas.auth import Principal
 from repositories.DALs.userDAL import UserDAL
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
+from utils.auth.hashing import async_hasher
+from utils.auth.principal_cache import principal_cache
+from utils.auth.principal_cache import PrincipalCache
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login/token")
 
 
 async def _get_user_by_email_for_auth(email: str, session: AsyncSession):
-    async with session.begin():
-        user_dal = UserDAL(session)
-        return await user_dal.get_user_by_email(email=email)
+    user_dal = UserDAL(session)
+    return await user_dal.get_user_by_email(email=email)
+
+
+async def _get_principal_by_email(
+    email: str, session: AsyncSession
+) -> Union[Principal, None]:
+    user_dal = UserDAL(session)
+    return await user_dal.get_principal_by_email(email=email)
+
+
+class PrincipalResolver(Protocol):
+    async def resolve(
+        self, payload: dict, session: AsyncSession
+    ) -> Union[Principal, None]: ...
+
+
+class DatabasePrincipalResolver:
+    def __init__(self, cache: PrincipalCache):
+        self.cache = cache
+
+    async def resolve(
+        self, payload: dict, session: AsyncSession
+    ) -> Union[Principal, None]:
+        email = payload.get("sub")
+        if email is None:
+            return
+        principal = await self.cache.get(email)
+        if principal is not None:
+            return principal
+        principal = await _get_principal_by_email(email=email, session=session)
+        if principal is not None and not is_replica(session):
+            await self.cache.set(email, principal)
+        return principal
+
+
+class ClaimsPrincipalResolver:
+    def __init__(self, fallback: PrincipalResolver):
+        self.fallback = fallback
+
+    async def resolve(
+        self, payload: dict, session: AsyncSession
+    ) -> Union[Principal, None]:
+        email = payload.get("sub")
+        user_id = payload.get("uid")
+        is_active = payload.get("active")
+        if email is None or user_id is None or is_active is None:
+            return await self.fallback.resolve(payload, session)
+        try:
+            return Principal(
+                user_id=uuid.UUID(user_id), email=email, is_active=is_active
+            )
+        except ValueError:
+            return
+
+
+database_principal_resolver = DatabasePrincipalResolver(principal_cache)
+
+principal_resolvers: dict[str, PrincipalResolver] = {
+    "database": database_principal_resolver,
+    "claims": ClaimsPrincipalResolver(fallback=database_principal_resolver),
+}
+
+
+def get_principal_resolver() -> PrincipalResolver:
+    return principal_resolvers[AUTH_PRINCIPAL_RESOLVER]
 
 
 async def authenticate_user(
@@ -30,14 +101,18 @@ async def authenticate_user(
     user = await _get_user_by_email_for_auth(email=email, session=db)
     if user is None:
         return
-    if not Hasher.verify_password(password, user.hashed_password):
+    # bcrypt takes far longer than the lookup; don't hold a connection for it.
+    await release_connection(db)
+    if not await async_hasher.verify_password(password, user.hashed_password):
         return
     return user
 
 
 async def get_current_user_from_token(
-    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
-):
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_read_db),
+    resolver: PrincipalResolver = Depends(get_principal_resolver),
+) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -46,11 +121,9 @@ async def get_current_user_from_token(
         payload = jwt.decode(
             token, ACCESS_TOKEN_SECRET_KEY, algorithms=[ACCESS_TOKEN_ALGORITHM]
         )
-        email: str = payload.get("sub")
-        print("username/email extracted is ", email)
     except JWTError:
         raise credentials_exception
-    user = await _get_user_by_email_for_auth(email=email, session=db)
-    if user is None:
+    principal = await resolver.resolve(payload, db)
+    if principal is None or not principal.is_active:
         raise credentials_exception
-    return user
+    return principal
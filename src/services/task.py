@@ -1,76 +1,342 @@
 import uuid
+from datetime import datetime
+from typing import AsyncIterator
 from typing import Union
 
-from db.models import Task
+from core.cache import task_access_cache
+from core.cache import task_cache
+from core.config import TASK_EXPORT_BATCH_SIZE
+from db.models import Status
+from db.session import is_replica
+from db.session import read_session
+from models.schemas.task import BulkCreateTasks
+from models.schemas.task import BulkDeleteTasks
+from models.schemas.task import BulkUpdateTasks
 from models.schemas.task import CreateTask
+from models.schemas.task import ExportFormat
 from models.schemas.task import ShowTask
 from repositories.DALs.taskDAL import TaskDAL
+from repositories.DALs.taskDAL import UsersUnavailableError
+from sqlalchemy import RowMapping
 from sqlalchemy.ext.asyncio import AsyncSession
+from utils.etag import make_etag
+from utils.task.cursor import decode_search_cursor
+from utils.task.cursor import decode_task_cursor
+from utils.task.cursor import encode_search_cursor
+from utils.task.cursor import encode_task_cursor
+from utils.task.export import render_csv
+from utils.task.export import render_csv_header
+from utils.task.export import render_ndjson
 
 
 async def _create_task(
     author_id: uuid.UUID, body: CreateTask, session: AsyncSession
 ) -> ShowTask:
-    async with session.begin():
-        task_dal = TaskDAL(session)
-        task: Task = await task_dal.create_task(
-            author_id=author_id, producers_ids=body.producers_ids, task=body.task
-        )
-        return ShowTask(
-            task_id=task.task_id,
-            task=task.task,
-            status=task.status,
-        )
+    task_dal = TaskDAL(session)
+    task = await task_dal.create_task(
+        author_id=author_id, producers_ids=body.producers_ids, task=body.task
+    )
+    return ShowTask(
+        task_id=task.task_id,
+        task=task.task,
+        status=task.status,
+    )
 
 
 async def _update_task(
-    task_id: uuid.UUID, update_task_params: dict, session: AsyncSession
-) -> Union[uuid.UUID, None]:
-    async with session.begin():
-        task_dal = TaskDAL(session)
-        updated_task_id = await task_dal.update_task(task_id, **update_task_params)
-        return updated_task_id
+    task_id: uuid.UUID,
+    user_id: uuid.UUID,
+    update_task_params: dict,
+    expected_versions: Union[list[int], None],
+    session: AsyncSession,
+):
+    task_dal = TaskDAL(session)
+    updated_task = await task_dal.update_task(
+        task_id,
+        author_id=user_id,
+        expected_versions=expected_versions,
+        **update_task_params,
+    )
+    if updated_task is not None:
+        return updated_task, None
+    # As with status changes, only a failed update reads the task to tell a
+    # missing task, a non-author and a stale If-Match apart.
+    current = await task_dal.get_task_status_access(task_id=task_id, user_id=user_id)
+    if current is None or (current.is_author and not current.is_active):
+        return None, None
+    return None, current
 
 
-async def _get_task(task_id: uuid.UUID, session: AsyncSession) -> Union[Task, None]:
-    async with session.begin():
-        task_dal = TaskDAL(session)
-        task: Task = await task_dal.get_task(task_id)
-        if task is not None:
-            return task
+async def _advance_task_status(
+    task_id: uuid.UUID,
+    user_id: uuid.UUID,
+    expected_status: Status,
+    session: AsyncSession,
+):
+    task_dal = TaskDAL(session)
+    advanced_task = await task_dal.advance_task_status(
+        task_id=task_id, user_id=user_id, expected_status=expected_status
+    )
+    if advanced_task is not None:
+        return advanced_task, None
+    # Only the failure path pays for a second query, to pick the error.
+    current = await task_dal.get_task_status_access(task_id=task_id, user_id=user_id)
+    if current is None:
+        return None, None
+    # Callers without access are refused before anything about the task's
+    # status is reported. For members, a task completed by a concurrent
+    # request is a conflict, while any other inactive task is missing.
+    if (
+        not (current.is_author or current.is_producer)
+        or current.is_active
+        or current.status == Status.Completed
+    ):
+        return None, current
+    return None, None
 
 
-async def _get_authors(task_id: uuid.UUID, session: AsyncSession) -> list[uuid.UUID]:
-    async with session.begin():
-        task_dal = TaskDAL(session)
-        authors = await task_dal.get_authors(task_id)
-        if authors is None:
-            return []
-        return authors
+async def _get_task_with_access(
+    task_id: uuid.UUID, user_id: uuid.UUID, session: AsyncSession
+) -> tuple[Union[ShowTask, None], bool, Union[str, None]]:
+    access_key = f"{task_id}:{user_id}"
+    cached_task = await task_cache.get(str(task_id))
+    cached_access = await task_access_cache.get(access_key)
+    if cached_task is not None and cached_access is not None:
+        return ShowTask.model_validate(cached_task), cached_access, cached_task["etag"]
+    task_dal = TaskDAL(session)
+    task, has_access = await task_dal.get_task_with_access(
+        task_id=task_id, user_id=user_id
+    )
+    if task is None:
+        return None, False, None
+    show_task = ShowTask.model_validate(task)
+    etag = make_etag(task_id, task.version)
+    if not is_replica(session):
+        await task_cache.set(
+            str(task_id), {**show_task.model_dump(mode="json"), "etag": etag}
+        )
+        await task_access_cache.set(access_key, has_access)
+    return show_task, has_access, etag
+
 
+async def _get_task_etag(
+    task_id: uuid.UUID, user_id: uuid.UUID, session: AsyncSession
+) -> tuple[Union[str, None], bool]:
+    access_key = f"{task_id}:{user_id}"
+    cached_task = await task_cache.get(str(task_id))
+    cached_access = await task_access_cache.get(access_key)
+    if cached_task is not None and cached_access is not None:
+        return cached_task["etag"], cached_access
+    task_dal = TaskDAL(session)
+    current = await task_dal.get_task_version(task_id=task_id, user_id=user_id)
+    if current is None:
+        return None, False
+    if not is_replica(session):
+        await task_access_cache.set(access_key, current.has_access)
+    return make_etag(task_id, current.version), current.has_access
 
-async def _get_producers(task_id: uuid.UUID, session: AsyncSession) -> list[uuid.UUID]:
-    async with session.begin():
-        task_dal = TaskDAL(session)
-        producers = await task_dal.get_producers(task_id)
-        if producers is None:
-            return []
-        return producers
+
+async def _get_authors(task_id: uuid.UUID, session: AsyncSession) -> list[uuid.UUID]:
+    task_dal = TaskDAL(session)
+    authors = await task_dal.get_authors(task_id)
+    if authors is None:
+        return []
+    return authors
 
 
 async def _delete_task(
     task_id: uuid.UUID, session: AsyncSession
 ) -> Union[uuid.UUID, None]:
-    async with session.begin():
-        task_dal = TaskDAL(session)
-        deleted_task_id = await task_dal.delete_task(task_id)
-        return deleted_task_id
+    task_dal = TaskDAL(session)
+    deleted_task_id = await task_dal.delete_task(task_id)
+    return deleted_task_id
 
 
 async def _restore_task(
     task_id: uuid.UUID, session: AsyncSession
 ) -> Union[uuid.UUID, None]:
-    async with session.begin():
-        task_dal = TaskDAL(session)
-        restored_task_id = await task_dal.restore_task(task_id)
-        return restored_task_id
+    task_dal = TaskDAL(session)
+    restored_task_id = await task_dal.restore_task(task_id)
+    return restored_task_id
+
+
+SHOW_TASK_FIELDS = tuple(ShowTask.model_fields)
+
+
+def _task_item(row: RowMapping) -> dict:
+    # Rows come straight from typed columns, so they are already valid
+    # ShowTask data and skip model validation.
+    return {field: row[field] for field in SHOW_TASK_FIELDS}
+
+
+async def _get_user_tasks_page(
+    user_id: uuid.UUID,
+    assigned: bool,
+    limit: int,
+    cursor: Union[str, None],
+    status: Union[Status, None],
+    is_active: Union[bool, None],
+    session: AsyncSession,
+) -> dict:
+    after = decode_task_cursor(cursor) if cursor is not None else None
+    task_dal = TaskDAL(session)
+    tasks = await task_dal.get_user_tasks(
+        user_id=user_id,
+        assigned=assigned,
+        limit=limit + 1,
+        after=after,
+        status=status,
+        is_active=is_active,
+    )
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = encode_task_cursor(tasks[-1]["created_at"], tasks[-1]["task_id"])
+    return {"items": [_task_item(task) for task in tasks], "next_cursor": next_cursor}
+
+
+async def _search_tasks_page(
+    user_id: uuid.UUID,
+    terms: str,
+    prefix: bool,
+    limit: int,
+    cursor: Union[str, None],
+    is_active: Union[bool, None],
+    session: AsyncSession,
+) -> dict:
+    after = decode_search_cursor(cursor) if cursor is not None else None
+    task_dal = TaskDAL(session)
+    found = await task_dal.search_tasks(
+        user_id=user_id,
+        terms=terms,
+        limit=limit + 1,
+        prefix=prefix,
+        after=after,
+        is_active=is_active,
+    )
+    next_cursor = None
+    if len(found) > limit:
+        found = found[:limit]
+        next_cursor = encode_search_cursor(found[-1]["rank"], found[-1]["task_id"])
+    return {"items": [_task_item(task) for task in found], "next_cursor": next_cursor}
+
+
+async def _export_tasks(
+    user_id: uuid.UUID,
+    export_format: ExportFormat,
+    since: Union[datetime, None],
+    use_primary: bool = False,
+) -> AsyncIterator[str]:
+    # The response body is produced after the request dependencies have been
+    # torn down, so the export holds its own session for the whole stream.
+    render = render_csv if export_format == ExportFormat.csv else render_ndjson
+    if export_format == ExportFormat.csv:
+        yield render_csv_header()
+    async with read_session(use_primary=use_primary) as session:
+        async with session.begin():
+            task_dal = TaskDAL(session)
+            result = await task_dal.stream_user_tasks(
+                user_id=user_id, batch_size=TASK_EXPORT_BATCH_SIZE, since=since
+            )
+            async for rows in result.partitions():
+                yield render(rows)
+
+
+def _bulk_access_error(
+    task_id: uuid.UUID, access: dict[uuid.UUID, tuple[bool, bool]]
+) -> Union[str, None]:
+    is_active, is_author = access.get(task_id, (False, False))
+    if task_id not in access or not is_active:
+        return f"Task with id {task_id} not found."
+    if not is_author:
+        return "Forbidden."
+
+
+def _bulk_result(task_id: Union[uuid.UUID, None], detail: Union[str, None]) -> dict:
+    # Built as a plain dict in BulkTaskResult's shape for the fast response path.
+    return {"task_id": task_id, "ok": detail is None, "detail": detail}
+
+
+async def _bulk_create_tasks(
+    author_id: uuid.UUID, body: BulkCreateTasks, session: AsyncSession
+) -> dict:
+    users_ids = {author_id}
+    for item in body.tasks:
+        users_ids.update(item.producers_ids)
+    task_dal = TaskDAL(session)
+    activity = await task_dal.get_users_activity(users_ids)
+    if not activity.get(author_id):
+        raise ValueError("Author must be active.")
+    results = []
+    new_tasks = []
+    for item in body.tasks:
+        producers_ids = list(dict.fromkeys(item.producers_ids))
+        missing_ids = [pid for pid in producers_ids if pid not in activity]
+        inactive_ids = [pid for pid in producers_ids if activity.get(pid) is False]
+        if not producers_ids:
+            detail = "At least one producer must be provided."
+            results.append(_bulk_result(None, detail))
+        elif missing_ids or inactive_ids:
+            detail = str(UsersUnavailableError(missing_ids, inactive_ids))
+            results.append(_bulk_result(None, detail))
+        else:
+            task_id = uuid.uuid4()
+            new_tasks.append(
+                {
+                    "task_id": task_id,
+                    "task": item.task,
+                    "producers_ids": producers_ids,
+                }
+            )
+            results.append(_bulk_result(task_id, None))
+    await task_dal.create_tasks(author_id=author_id, tasks=new_tasks)
+    return {"results": results}
+
+
+async def _bulk_update_tasks(
+    user_id: uuid.UUID, body: BulkUpdateTasks, session: AsyncSession
+) -> dict:
+    task_dal = TaskDAL(session)
+    access = await task_dal.get_tasks_authorship(
+        task_ids=[item.task_id for item in body.tasks], user_id=user_id
+    )
+    errors = {}
+    updates = {}
+    for item in body.tasks:
+        update_task_params = item.model_dump(exclude_none=True, exclude={"task_id"})
+        detail = _bulk_access_error(item.task_id, access)
+        if detail is None and update_task_params == {}:
+            detail = "At least one parameter must be provided."
+        if detail is None:
+            updates[item.task_id] = update_task_params
+        errors[item.task_id] = detail
+    updated_ids = set(await task_dal.update_tasks(updates))
+    results = []
+    for item in body.tasks:
+        detail = errors[item.task_id]
+        if detail is None and item.task_id not in updated_ids:
+            detail = f"Task with id {item.task_id} not found."
+        results.append(_bulk_result(item.task_id, detail))
+    return {"results": results}
+
+
+async def _bulk_delete_tasks(
+    user_id: uuid.UUID, body: BulkDeleteTasks, session: AsyncSession
+) -> dict:
+    task_dal = TaskDAL(session)
+    access = await task_dal.get_tasks_authorship(
+        task_ids=body.task_ids, user_id=user_id
+    )
+    errors = {task_id: _bulk_access_error(task_id, access) for task_id in body.task_ids}
+    deleted_ids = set(
+        await task_dal.delete_tasks(
+            [task_id for task_id, detail in errors.items() if detail is None]
+        )
+    )
+    results = []
+    for task_id in body.task_ids:
+        detail = errors[task_id]
+        if detail is None and task_id not in deleted_ids:
+            detail = f"Task with id {task_id} not found."
+        results.append(_bulk_result(task_id, detail))
+    return {"results": results}
@@ -1,77 +1,120 @@
 import uuid
 from typing import Union
 
+from core.cache import user_cache
+from db.models import Status
 from db.models import User
-from models.schemas.auth import Hasher
+from db.session import is_replica
 from models.schemas.user import CreateUser
 from models.schemas.user import ShowUser
+from models.schemas.user import UserTaskStats
+from repositories.DALs.taskStatsDAL import TaskStatsDAL
 from repositories.DALs.userDAL import UserDAL
 from sqlalchemy.ext.asyncio import AsyncSession
+from utils.auth.hashing import async_hasher
+from utils.etag import make_etag
 
 
 async def _create_user(body: CreateUser, session: AsyncSession) -> ShowUser:
-    async with session.begin():
-        user_dal = UserDAL(session)
-        user: User = await user_dal.create_user(
-            username=body.username,
-            email=body.email,
-            hashed_password=Hasher.get_password_hash(body.password),
-        )
-        return ShowUser(
-            user_id=user.user_id,
-            username=user.username,
-            email=user.email,
-            is_active=user.is_active,
-        )
+    hashed_password = await async_hasher.get_password_hash(body.password)
+    user_dal = UserDAL(session)
+    user: User = await user_dal.create_user(
+        username=body.username,
+        email=body.email,
+        hashed_password=hashed_password,
+    )
+    return ShowUser(
+        user_id=user.user_id,
+        username=user.username,
+        email=user.email,
+        is_active=user.is_active,
+    )
 
 
 async def _update_user(
-    user_id: uuid.UUID, update_user_params: dict, session: AsyncSession
-) -> Union[uuid.UUID, None]:
-    async with session.begin():
-        user_dal = UserDAL(session)
-        updated_user_id = await user_dal.update_user(
-            user_id=user_id, **update_user_params
-        )
-        return updated_user_id
+    user_id: uuid.UUID,
+    update_user_params: dict,
+    expected_versions: Union[list[int], None],
+    session: AsyncSession,
+):
+    user_dal = UserDAL(session)
+    updated_user = await user_dal.update_user(
+        user_id=user_id, expected_versions=expected_versions, **update_user_params
+    )
+    if updated_user is not None:
+        return updated_user, None
+    # Only a failed update reads the current version, to tell a missing user
+    # from a stale If-Match.
+    return None, await user_dal.get_user_version(user_id=user_id)
 
 
 async def _get_user_by_id(
     user_id: uuid.UUID, session: AsyncSession
-) -> Union[User, None]:
-    async with session.begin():
-        user_dal = UserDAL(session)
-        user: User = await user_dal.get_user_by_id(user_id=user_id)
-        if user is not None:
-            return user
+) -> tuple[Union[ShowUser, None], Union[str, None]]:
+    cached_user = await user_cache.get(str(user_id))
+    if cached_user is not None:
+        return ShowUser.model_validate(cached_user), cached_user["etag"]
+    user_dal = UserDAL(session)
+    user: User = await user_dal.get_user_by_id(user_id=user_id)
+    if user is None:
+        return None, None
+    show_user = ShowUser.model_validate(user)
+    etag = make_etag(user_id, user.version)
+    if not is_replica(session):
+        await user_cache.set(
+            str(user_id), {**show_user.model_dump(mode="json"), "etag": etag}
+        )
+    return show_user, etag
+
+
+async def _get_user_etag(user_id: uuid.UUID, session: AsyncSession) -> Union[str, None]:
+    cached_user = await user_cache.get(str(user_id))
+    if cached_user is not None:
+        return cached_user["etag"]
+    user_dal = UserDAL(session)
+    version = await user_dal.get_user_version(user_id=user_id)
+    if version is not None:
+        return make_etag(user_id, version)
 
 
 async def _get_created_tasks(
     user_id: uuid.UUID, session: AsyncSession
 ) -> list[uuid.UUID]:
-    async with session.begin():
-        user_dal = UserDAL(session)
-        created_tasks = await user_dal.get_created_tasks(user_id=user_id)
-        if created_tasks is None:
-            return []
-        return created_tasks
+    user_dal = UserDAL(session)
+    created_tasks = await user_dal.get_created_tasks(user_id=user_id)
+    if created_tasks is None:
+        return []
+    return created_tasks
 
 
 async def _get_assigned_tasks(
     user_id: uuid.UUID, session: AsyncSession
 ) -> list[uuid.UUID]:
-    async with session.begin():
-        user_dal = UserDAL(session)
-        assigned_tasks = await user_dal.get_assigned_tasks(user_id=user_id)
-        if assigned_tasks is None:
-            return []
-        return assigned_tasks
+    user_dal = UserDAL(session)
+    assigned_tasks = await user_dal.get_assigned_tasks(user_id=user_id)
+    if assigned_tasks is None:
+        return []
+    return assigned_tasks
 
 
 async def _delete_user(
     user_id: uuid.UUID, session: AsyncSession
 ) -> Union[uuid.UUID, None]:
-    async with session.begin():
-        user_dal = UserDAL(session)
-        deleted_user_id = await user_dal.delete_user(user_id=user_id)
-        return deleted_user_id
+    user_dal = UserDAL(session)
+    deleted_user_id = await user_dal.delete_user(user_id=user_id)
+    return deleted_user_id
+
+
+async def _get_user_task_stats(
+    user_id: uuid.UUID, session: AsyncSession
+) -> UserTaskStats:
+    stats_dal = TaskStatsDAL(session)
+    counts = await stats_dal.get_user_counts(user_id=user_id)
+    # Statuses a user never had a task in have no counter row.
+    return UserTaskStats(
+        user_id=user_id,
+        **{
+            role: {status.value: role_counts.get(status, 0) for status in Status}
+            for role, role_counts in counts.items()
+        },
+    )
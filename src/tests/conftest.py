@@ -0,0 +1,91 @@
+import os
+import tempfile
+
+import httpx
+import pytest
+
+
+def pytest_configure(config):
+    # Settings are read at import time, so they must be in place before the
+    # app is imported. Strict mode turns every request over its query budget
+    # into a failing test.
+    db_path = os.path.join(tempfile.mkdtemp(prefix="todo-tests-"), "test.db")
+    os.environ.setdefault("REAL_DB_URL", f"sqlite+aiosqlite:///{db_path}")
+    os.environ.setdefault("QUERY_BUDGET_STRICT", "true")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    # Every test starts from an empty database, so nothing cached by an earlier
+    # test may answer for it.
+    from core.cache import MemoryCacheBackend
+    from core.cache import task_access_cache
+    from core.cache import task_cache
+    from core.cache import user_cache
+    from core.read_your_writes import MemoryPinBackend
+    from core.read_your_writes import primary_pins
+    from utils.auth.principal_cache import principal_cache
+
+    backend = MemoryCacheBackend(max_size=1000)
+    for cache in (task_cache, task_access_cache, user_cache, principal_cache):
+        monkeypatch.setattr(cache, "backend", backend)
+    monkeypatch.setattr(primary_pins, "backend", MemoryPinBackend())
+
+
+@pytest.fixture
+async def app():
+    from db import session as db_session
+    from db.models import Base
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        async with db_session.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        yield app
+
+
+@pytest.fixture
+async def client(app):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def sign_up(client):
+    async def sign_up(username: str) -> tuple[dict, dict]:
+        email = f"{username}@example.com"
+        response = await client.post(
+            "/user/", json={"username": username, "email": email, "password": "pw"}
+        )
+        assert response.status_code == 200
+        user = response.json()
+        response = await client.post(
+            "/login/token", data={"username": email, "password": "pw"}
+        )
+        assert response.status_code == 200
+        token = response.json()["access_token"]
+        return user, {"Authorization": f"Bearer {token}"}
+
+    return sign_up
+
+
+@pytest.fixture
+async def signed_up(sign_up):
+    return await sign_up("alice")
+
+
+@pytest.fixture
+def user(signed_up):
+    return signed_up[0]
+
+
+@pytest.fixture
+def auth_headers(signed_up):
+    return signed_up[1]
@@ -0,0 +1,106 @@
+import uuid
+
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def _create_task(client, headers, producer_id, text="task"):
+    response = await client.post(
+        "/task/", json={"task": text, "producers_ids": [producer_id]}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["task_id"]
+
+
+async def _task_text(client, headers, task_id):
+    response = await client.get("/task/", params={"task_id": task_id}, headers=headers)
+    return response.json()["task"]
+
+
+async def test_bulk_create_reports_each_item(client, user, auth_headers):
+    missing_id = str(uuid.uuid4())
+    response = await client.post(
+        "/task/bulk",
+        json={
+            "tasks": [
+                {"task": "fine", "producers_ids": [user["user_id"]]},
+                {"task": "unknown producer", "producers_ids": [missing_id]},
+                {"task": "no producers", "producers_ids": []},
+            ]
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    created, unknown, empty = response.json()["results"]
+    assert created["ok"] and created["detail"] is None
+    assert not unknown["ok"] and missing_id in unknown["detail"]
+    assert empty == {
+        "task_id": None,
+        "ok": False,
+        "detail": "At least one producer must be provided.",
+    }
+    assert await _task_text(client, auth_headers, created["task_id"]) == "fine"
+
+
+async def test_bulk_update_reports_each_item(client, user, auth_headers, sign_up):
+    other, other_headers = await sign_up("bob")
+    own_id = await _create_task(client, auth_headers, user["user_id"], "old")
+    others_id = await _create_task(client, other_headers, other["user_id"], "bob's")
+    missing_id = str(uuid.uuid4())
+    response = await client.patch(
+        "/task/bulk",
+        json={
+            "tasks": [
+                {"task_id": own_id, "task": "new"},
+                {"task_id": missing_id, "task": "new"},
+                {"task_id": others_id, "task": "new"},
+            ]
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["results"] == [
+        {"task_id": own_id, "ok": True, "detail": None},
+        {
+            "task_id": missing_id,
+            "ok": False,
+            "detail": f"Task with id {missing_id} not found.",
+        },
+        {"task_id": others_id, "ok": False, "detail": "Forbidden."},
+    ]
+    assert await _task_text(client, auth_headers, own_id) == "new"
+    assert await _task_text(client, other_headers, others_id) == "bob's"
+
+
+async def test_bulk_update_rejects_duplicate_ids(client, user, auth_headers):
+    task_id = await _create_task(client, auth_headers, user["user_id"])
+    response = await client.patch(
+        "/task/bulk",
+        json={"tasks": [{"task_id": task_id, "task": "a"}] * 2},
+        headers=auth_headers,
+    )
+    assert response.status_code == 422
+
+
+async def test_bulk_deleted_task_can_be_restored(client, user, auth_headers):
+    task_id = await _create_task(client, auth_headers, user["user_id"])
+    response = await client.request(
+        "DELETE", "/task/bulk", json={"task_ids": [task_id]}, headers=auth_headers
+    )
+    assert response.json()["results"] == [
+        {"task_id": task_id, "ok": True, "detail": None}
+    ]
+    response = await client.get(
+        "/task/", params={"task_id": task_id}, headers=auth_headers
+    )
+    assert response.status_code == 404
+    response = await client.post(
+        "/task/restore", params={"task_id": task_id}, headers=auth_headers
+    )
+    assert response.status_code == 200, response.text
+    response = await client.get(
+        "/task/", params={"task_id": task_id}, headers=auth_headers
+    )
+    assert response.json()["status"] == "Zero"
@@ -0,0 +1,92 @@
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def task_id(client, user, auth_headers):
+    response = await client.post(
+        "/task/",
+        json={"task": "v1", "producers_ids": [user["user_id"]]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["task_id"]
+
+
+async def _get_task(client, task_id, headers, **extra_headers):
+    return await client.get(
+        "/task/", params={"task_id": task_id}, headers={**headers, **extra_headers}
+    )
+
+
+async def _patch_task(client, task_id, headers, etag, text):
+    return await client.patch(
+        "/task/",
+        params={"task_id": task_id},
+        json={"task": text},
+        headers={**headers, "If-Match": etag},
+    )
+
+
+async def test_task_if_match_with_fresh_tag_updates(client, auth_headers, task_id):
+    etag = (await _get_task(client, task_id, auth_headers)).headers["ETag"]
+    response = await _patch_task(client, task_id, auth_headers, etag, "v2")
+    assert response.status_code == 200, response.text
+    assert response.headers["ETag"] != etag
+    new_etag = response.headers["ETag"]
+    response = await _get_task(client, task_id, auth_headers)
+    assert response.json()["task"] == "v2"
+    assert response.headers["ETag"] == new_etag
+
+
+async def test_task_if_match_with_stale_tag_fails(client, auth_headers, task_id):
+    etag = (await _get_task(client, task_id, auth_headers)).headers["ETag"]
+    assert (await _patch_task(client, task_id, auth_headers, etag, "v2")).is_success
+    response = await _patch_task(client, task_id, auth_headers, etag, "v3")
+    assert response.status_code == 412
+    response = await _get_task(client, task_id, auth_headers)
+    assert response.json()["task"] == "v2"
+
+
+async def test_status_advance_changes_task_tag(client, auth_headers, task_id):
+    etag = (await _get_task(client, task_id, auth_headers)).headers["ETag"]
+    response = await client.patch(
+        "/task/status",
+        params={"task_id": task_id, "expected_status": "Zero"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    response = await _patch_task(client, task_id, auth_headers, etag, "v2")
+    assert response.status_code == 412
+
+
+async def test_task_if_none_match(client, auth_headers, task_id):
+    etag = (await _get_task(client, task_id, auth_headers)).headers["ETag"]
+    response = await _get_task(client, task_id, auth_headers, **{"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    await _patch_task(client, task_id, auth_headers, etag, "v2")
+    response = await _get_task(client, task_id, auth_headers, **{"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+async def test_user_conditional_requests(client, user, auth_headers):
+    params = {"user_id": user["user_id"]}
+    etag = (await client.get("/user/", params=params, headers=auth_headers)).headers[
+        "ETag"
+    ]
+    response = await client.get(
+        "/user/", params=params, headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    for username, status_code in (("alice2", 200), ("alice3", 412)):
+        response = await client.patch(
+            "/user/",
+            params=params,
+            json={"username": username},
+            headers={**auth_headers, "If-Match": etag},
+        )
+        assert response.status_code == status_code, response.text
@@ -0,0 +1,36 @@
+import uuid
+
+import pytest
+from db import session as db_session
+from db.models import Base
+from db.models import Task
+from repositories.DALs.userDAL import UserDAL
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+
+
+def test_relationships_never_lazy_load():
+    for mapper in Base.registry.mappers:
+        for relationship in mapper.relationships:
+            assert relationship.lazy == "raise", str(relationship)
+
+
+@pytest.mark.anyio
+async def test_unloaded_relationship_access_raises(client, user, auth_headers):
+    other = await client.post(
+        "/user/", json={"username": "bob", "email": "bob@example.com", "password": "pw"}
+    )
+    response = await client.post(
+        "/task/",
+        json={"task": "write tests", "producers_ids": [other.json()["user_id"]]},
+        headers=auth_headers,
+    )
+    task_id = uuid.UUID(response.json()["task_id"])
+
+    async with db_session.async_session() as session:
+        loaded_user = await UserDAL(session).get_user_by_id(uuid.UUID(user["user_id"]))
+        with pytest.raises(InvalidRequestError, match="lazy='raise'"):
+            loaded_user.created_tasks
+        task = await session.scalar(select(Task).where(Task.task_id == task_id))
+        with pytest.raises(InvalidRequestError, match="lazy='raise'"):
+            task.producers
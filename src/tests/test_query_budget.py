@@ -0,0 +1,27 @@
+import pytest
+from core.query_counter import QueryBudgetExceeded
+from core.query_counter import QueryCounterMiddleware
+
+
+pytestmark = pytest.mark.anyio
+
+
+def _query_counter(app) -> QueryCounterMiddleware:
+    layer = app.middleware_stack
+    while not isinstance(layer, QueryCounterMiddleware):
+        layer = layer.app
+    return layer
+
+
+async def test_request_within_budget_passes(client, auth_headers):
+    response = await client.get("/task/created", headers=auth_headers)
+    assert response.status_code == 200
+    assert 'desc="' in response.headers["Server-Timing"]
+
+
+async def test_request_over_budget_fails_in_strict_mode(
+    app, client, auth_headers, monkeypatch
+):
+    monkeypatch.setattr(_query_counter(app), "budgets", {"GET /task/created": 0})
+    with pytest.raises(QueryBudgetExceeded, match="GET /task/created ran"):
+        await client.get("/task/created", headers=auth_headers)
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def task_ids(client, user, auth_headers):
+    response = await client.post(
+        "/task/bulk",
+        json={
+            "tasks": [
+                {"task": f"task {n}", "producers_ids": [user["user_id"]]}
+                for n in range(5)
+            ]
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    return [result["task_id"] for result in response.json()["results"]]
+
+
+async def _walk_pages(client, headers, path, **params):
+    seen = []
+    cursor = None
+    while True:
+        query = {**params, "limit": 2}
+        if cursor is not None:
+            query["cursor"] = cursor
+        response = await client.get(path, params=query, headers=headers)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page["items"]) <= 2
+        seen.extend(item["task_id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize("path", ["/task/created", "/task/assigned"])
+async def test_cursor_walks_every_task_once(client, auth_headers, task_ids, path):
+    seen = await _walk_pages(client, auth_headers, path)
+    assert sorted(seen) == sorted(task_ids)
+
+
+async def test_deleted_tasks_page_separately(client, auth_headers, task_ids):
+    deleted_id = task_ids[0]
+    response = await client.delete(
+        "/task/", params={"task_id": deleted_id}, headers=auth_headers
+    )
+    assert response.status_code == 200, response.text
+    active = await _walk_pages(client, auth_headers, "/task/created")
+    inactive = await _walk_pages(client, auth_headers, "/task/created", is_active=False)
+    assert sorted(active) == sorted(task_ids[1:])
+    assert inactive == [deleted_id]
+
+
+async def test_malformed_cursor_is_rejected(client, auth_headers, task_ids):
+    response = await client.get(
+        "/task/created", params={"cursor": "not-a-cursor"}, headers=auth_headers
+    )
+    assert response.status_code == 422
+
+
+async def test_export_streams_every_task(client, auth_headers, task_ids):
+    response = await client.get("/task/export", headers=auth_headers)
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(row["task_id"] for row in rows) == sorted(task_ids)
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def task(client, auth_headers, sign_up):
+    producer, producer_headers = await sign_up("bob")
+    response = await client.post(
+        "/task/",
+        json={"task": "ship it", "producers_ids": [producer["user_id"]]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def _advance(client, task_id, expected_status, headers):
+    return await client.patch(
+        "/task/status",
+        params={"task_id": task_id, "expected_status": expected_status},
+        headers=headers,
+    )
+
+
+async def test_advance_moves_to_next_status(client, auth_headers, task):
+    response = await _advance(client, task["task_id"], "Zero", auth_headers)
+    assert response.status_code == 200
+    response = await client.get(
+        "/task/", params={"task_id": task["task_id"]}, headers=auth_headers
+    )
+    assert response.json()["status"] == "Active"
+
+
+async def test_stale_expected_status_conflicts(client, auth_headers, task):
+    await _advance(client, task["task_id"], "Zero", auth_headers)
+    response = await _advance(client, task["task_id"], "Zero", auth_headers)
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Task status is Active, expected Zero."
+
+
+async def test_concurrent_advances_apply_once(client, auth_headers, task):
+    responses = await asyncio.gather(
+        *[_advance(client, task["task_id"], "Zero", auth_headers) for _ in range(2)]
+    )
+    assert sorted(response.status_code for response in responses) == [200, 409]
+    response = await client.get(
+        "/task/", params={"task_id": task["task_id"]}, headers=auth_headers
+    )
+    assert response.json()["status"] == "Active"
+
+
+@pytest.mark.parametrize("expected_status", ["Zero", "Active"])
+async def test_non_member_is_forbidden_before_any_conflict(
+    client, sign_up, task, expected_status
+):
+    _, outsider_headers = await sign_up("mallory")
+    response = await _advance(
+        client, task["task_id"], expected_status, outsider_headers
+    )
+    assert response.status_code == 403
+
+
+async def test_non_member_is_forbidden_on_completed_task(
+    client, auth_headers, sign_up, task
+):
+    for status in ("Zero", "Active", "Verify"):
+        response = await _advance(client, task["task_id"], status, auth_headers)
+        assert response.status_code == 200
+    _, outsider_headers = await sign_up("mallory")
+    response = await _advance(client, task["task_id"], "Completed", outsider_headers)
+    assert response.status_code == 403
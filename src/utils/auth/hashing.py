@@ -0,0 +1,85 @@
+import asyncio
+import time
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from typing import Union
+
+from core.config import PASSWORD_HASHER_EXECUTOR
+from core.config import PASSWORD_HASHER_MAX_CONCURRENCY
+from core.config import PASSWORD_HASHER_MAX_WORKERS
+from core.metrics import PASSWORD_HASHING_DURATION
+from core.metrics import PASSWORD_HASHING_QUEUED
+from core.metrics import PASSWORD_HASHING_RUNNING
+from models.schemas.auth import Hasher
+
+
+class AsyncHasher:
+    """Runs bcrypt off the event loop on a bounded thread or process pool."""
+
+    def __init__(self, executor_kind: str, max_workers: int, max_concurrency: int):
+        if executor_kind not in ("thread", "process"):
+            raise ValueError(f"Unknown hasher executor: {executor_kind}")
+        self.executor_kind = executor_kind
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self._executor: Union[Executor, None] = None
+        self._semaphore: Union[asyncio.Semaphore, None] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="hasher"
+                )
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _run(self, operation: str, func: Callable, *args):
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        acquired = False
+        PASSWORD_HASHING_QUEUED.inc()
+        try:
+            async with self._get_semaphore():
+                PASSWORD_HASHING_QUEUED.dec()
+                acquired = True
+                PASSWORD_HASHING_RUNNING.inc()
+                start = time.perf_counter()
+                try:
+                    return await loop.run_in_executor(executor, func, *args)
+                finally:
+                    PASSWORD_HASHING_DURATION.labels(operation=operation).observe(
+                        time.perf_counter() - start
+                    )
+                    PASSWORD_HASHING_RUNNING.dec()
+        finally:
+            if not acquired:
+                PASSWORD_HASHING_QUEUED.dec()
+
+    async def verify_password(self, plain_pass: str, hashed_pass: str) -> bool:
+        return await self._run(
+            "verify", Hasher.verify_password, plain_pass, hashed_pass
+        )
+
+    async def get_password_hash(self, plain_pass: str) -> str:
+        return await self._run("hash", Hasher.get_password_hash, plain_pass)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+async_hasher = AsyncHasher(
+    executor_kind=PASSWORD_HASHER_EXECUTOR,
+    max_workers=PASSWORD_HASHER_MAX_WORKERS,
+    max_concurrency=PASSWORD_HASHER_MAX_CONCURRENCY,
+)
@@ -0,0 +1,59 @@
+import uuid
+from typing import Union
+
+from core.cache import CacheBackend
+from core.cache import create_cache_backend
+from core.config import AUTH_PRINCIPAL_CACHE_MAX_SIZE
+from core.config import AUTH_PRINCIPAL_CACHE_TTL_SECONDS
+from core.metrics import CACHE_HITS
+from core.metrics import CACHE_MISSES
+from models.schemas.auth import Principal
+
+
+class PrincipalCache:
+    """TTL cache of authenticated principals keyed on the token subject.
+
+    Entries live in a cache backend, so with the shared backend a user update
+    or delete in one worker is seen by every other worker.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: float):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._hits_metric = CACHE_HITS.labels(cache="principal")
+        self._misses_metric = CACHE_MISSES.labels(cache="principal")
+
+    async def get(self, subject: str) -> Union[Principal, None]:
+        principal = await self.backend.get(f"principal:{subject}")
+        if principal is not None:
+            # A principal only counts while its user still points at it, so
+            # losing the user entry (invalidated or evicted) drops it too.
+            current = await self.backend.get(f"principal_user:{principal['user_id']}")
+            if current == subject:
+                self._hits_metric.inc()
+                return Principal.model_validate(principal)
+        self._misses_metric.inc()
+        return None
+
+    async def set(self, subject: str, principal: Principal) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        await self.backend.set(
+            f"principal_user:{principal.user_id}", subject, self.ttl_seconds
+        )
+        await self.backend.set(
+            f"principal:{subject}", principal.model_dump(mode="json"), self.ttl_seconds
+        )
+
+    async def invalidate_user(self, user_id: uuid.UUID) -> None:
+        subject = await self.backend.get(f"principal_user:{user_id}")
+        keys = [f"principal_user:{user_id}"]
+        if subject is not None:
+            keys.append(f"principal:{subject}")
+        await self.backend.delete(*keys)
+
+
+principal_cache = PrincipalCache(
+    create_cache_backend(max_size=AUTH_PRINCIPAL_CACHE_MAX_SIZE),
+    ttl_seconds=AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+)
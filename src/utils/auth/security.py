@@ -4,13 +4,21 @@ from datetime import timezone
 from typing import Optional
 
 from core.config import ACCESS_TOKEN_ALGORITHM
+from core.config import ACCESS_TOKEN_EMBED_CLAIMS
 from core.config import ACCESS_TOKEN_EXPIRE_MINUTES
 from core.config import ACCESS_TOKEN_SECRET_KEY
 from jose import jwt
+from models.schemas.auth import Principal
 
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+def create_access_token(
+    data: dict,
+    expires_delta: Optional[timedelta] = None,
+    principal: Optional[Principal] = None,
+) -> str:
     to_encode = data.copy()
+    if principal is not None and ACCESS_TOKEN_EMBED_CLAIMS:
+        to_encode.update({"uid": str(principal.user_id), "active": principal.is_active})
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
@@ -0,0 +1,35 @@
+import uuid
+from typing import Union
+
+
+def make_etag(pk: uuid.UUID, version: int) -> str:
+    # The version is the row's version counter, which every UPDATE bumps, so
+    # the tag turns back into an exact WHERE condition on any backend.
+    return f'"{pk.hex}.{version:x}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison.
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in tags
+
+
+def if_match_versions(
+    if_match: Union[str, None], pk: uuid.UUID
+) -> Union[list[int], None]:
+    """Versions accepted by an If-Match header, None when any version is."""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    versions = []
+    for tag in if_match.split(","):
+        # If-Match uses the strong comparison, so weak tags never match.
+        pk_hex, _, version = tag.strip().strip('"').partition(".")
+        if pk_hex != pk.hex:
+            continue
+        try:
+            versions.append(int(version, 16))
+        except ValueError:
+            continue
+    return versions
@@ -0,0 +1,31 @@
+import base64
+import uuid
+from datetime import datetime
+
+
+def encode_task_cursor(created_at: datetime, task_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{task_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_task_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, task_id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(task_id)
+    except ValueError:
+        raise ValueError("Invalid cursor.")
+
+
+def encode_search_cursor(rank: float, task_id: uuid.UUID) -> str:
+    raw = f"{rank!r}|{task_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        rank, task_id = raw.split("|")
+        return float(rank), uuid.UUID(task_id)
+    except ValueError:
+        raise ValueError("Invalid cursor.")
@@ -0,0 +1,48 @@
+import csv
+import io
+import json
+from typing import Sequence
+
+from sqlalchemy import Row
+
+
+EXPORT_COLUMNS = (
+    "task_id",
+    "task",
+    "status",
+    "is_active",
+    "is_author",
+    "is_producer",
+    "created_at",
+    "updated_at",
+)
+
+
+def _plain(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def render_ndjson(rows: Sequence[Row]) -> str:
+    return "".join(
+        json.dumps({column: _plain(row._mapping[column]) for column in EXPORT_COLUMNS})
+        + "\n"
+        for row in rows
+    )
+
+
+def render_csv_header() -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(EXPORT_COLUMNS)
+    return buffer.getvalue()
+
+
+def render_csv(rows: Sequence[Row]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(_plain(row._mapping[column]) for column in EXPORT_COLUMNS)
+    return buffer.getvalue()